@@ -0,0 +1,18 @@
+from fastapi import Request
+
+from app.services.classification import ClassificationService
+
+def get_classification_service(request: Request) -> ClassificationService:
+    """
+    Get the shared classification service.
+    
+    The service (and with it the OpenAI clients and their connection pools)
+    is created once in the application lifespan and reused by every request.
+    
+    Args:
+        request: FastAPI request
+        
+    Returns:
+        Classification service stored on the application state
+    """
+    return request.app.state.classification_service
@@ -1,9 +1,14 @@
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, HttpUrl
+from fastapi import APIRouter, Depends, UploadFile, File, Path
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, HttpUrl
 from loguru import logger
+from typing import List
 import time
 
+from app.api.dependencies import get_classification_service
+from app.core.config import settings
+from app.core.logging import is_level_enabled
 from app.services.classification import ClassificationService
 from app.utils.api_utils import (
     format_success_response,
@@ -14,9 +19,6 @@ from app.utils.api_utils import (
 
 router = APIRouter()
 
-# Create a global instance of the classification service
-classification_service = ClassificationService()
-
 
 class ImageUrlRequest(BaseModel):
     """
@@ -28,8 +30,21 @@ class ImageUrlRequest(BaseModel):
     url: HttpUrl
 
 
+class BulkClassificationRequest(BaseModel):
+    """
+    Request model for bulk image URL classification.
+
+    This model defines the structure of the request body for the bulk classification endpoint.
+    """
+
+    urls: List[HttpUrl] = Field(..., min_length=1)
+
+
 @router.post("/classify")
-async def classify_image(file: UploadFile = File(...)):
+async def classify_image(
+    file: UploadFile = File(...),
+    classification_service: ClassificationService = Depends(get_classification_service),
+):
     """
     Classify an uploaded image into brand safety categories.
 
@@ -38,39 +53,54 @@ async def classify_image(file: UploadFile = File(...)):
 
     Args:
         file: Uploaded image file
+        classification_service: Shared classification service
 
     Returns:
         Classification results
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     try:
-        logger.info(f"Received image classification request: {file.filename}")
+        logger.info("Received image classification request: {}", file.filename)
 
         # Check if the file is an image
         if not validate_image_format(file.content_type):
             error_message = f"Unsupported file format: {file.content_type}"
             logger.error(error_message)
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400, content=format_error_response(error_message, 400)
             )
 
+        # Reject oversized uploads before reading them into memory
+        if file.size is not None and file.size > settings.MAX_IMAGE_SIZE:
+            error_message = f"Image too large: {file.size} bytes"
+            logger.error(error_message)
+            return ORJSONResponse(
+                status_code=413, content=format_error_response(error_message, 413)
+            )
+
+        # Read the upload once and hand the bytes to the service
+        data = await file.read()
+
         # Classify the image
-        result = classification_service.classify_uploaded_image(file)
+        result = await classification_service.aclassify_bytes(data, file.filename)
 
         # Check for errors
         if "error" in result:
             error_message = result["error"]
             logger.error(error_message)
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500, content=format_error_response(error_message, 500)
             )
 
-        # Calculate total endpoint processing time
-        total_time = time.time() - start_time
-        # Include the original filename and note that it was processed with a UUID filename
-        logger.info(
-            f"[API] Successfully classified image '{file.filename}' (Total endpoint time: {total_time:.2f}s)"
-        )
+        # Calculate total endpoint processing time (only if it will be logged)
+        if is_level_enabled("INFO"):
+            total_time = time.perf_counter() - start_time
+            # Include the original filename and note that it was processed with a UUID filename
+            logger.info(
+                "[API] Successfully classified image '{}' (Total endpoint time: {:.2f}s)",
+                file.filename,
+                total_time,
+            )
 
         return format_success_response(result)
 
@@ -80,7 +110,10 @@ async def classify_image(file: UploadFile = File(...)):
 
 
 @router.post("/classify-url")
-async def classify_image_url(request: ImageUrlRequest):
+async def classify_image_url(
+    request: ImageUrlRequest,
+    classification_service: ClassificationService = Depends(get_classification_service),
+):
     """
     Classify an image from a URL into brand safety categories.
 
@@ -89,34 +122,115 @@ async def classify_image_url(request: ImageUrlRequest):
 
     Args:
         request: Request containing the image URL
+        classification_service: Shared classification service
 
     Returns:
         Classification results
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     try:
         url = str(request.url)
-        logger.info(f"Received image URL classification request: {url}")
+        logger.info("Received image URL classification request: {}", url)
 
         # Classify the image URL
-        result = classification_service.classify_image_url(url)
+        result = await classification_service.aclassify_image_url(url)
 
         # Check for errors
         if "error" in result:
             error_message = result["error"]
             logger.error(error_message)
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=500, content=format_error_response(error_message, 500)
             )
 
-        # Calculate total endpoint processing time
-        total_time = time.time() - start_time
-        logger.info(
-            f"[API] Successfully classified image URL: {url} (Total endpoint time: {total_time:.2f}s)"
-        )
+        # Calculate total endpoint processing time (only if it will be logged)
+        if is_level_enabled("INFO"):
+            total_time = time.perf_counter() - start_time
+            logger.info(
+                "[API] Successfully classified image URL: {} (Total endpoint time: {:.2f}s)",
+                url,
+                total_time,
+            )
 
         return format_success_response(result)
 
     except Exception as e:
         # Handle unexpected errors
         raise handle_api_error(e, f"Failed to classify image URL: {str(e)}")
+
+
+@router.post("/classify-bulk")
+async def classify_bulk(
+    request: BulkClassificationRequest,
+    classification_service: ClassificationService = Depends(get_classification_service),
+):
+    """
+    Submit image URLs for offline bulk classification.
+
+    This endpoint submits the image URLs through the OpenAI Batch API, which
+    classifies them at a lower cost within 24 hours. The returned batch ID is
+    used to collect the results from the /classify-bulk/{batch_id} endpoint.
+
+    Args:
+        request: Request containing the image URLs
+        classification_service: Shared classification service
+
+    Returns:
+        Batch information
+    """
+    try:
+        urls = [str(url) for url in request.urls]
+        logger.info("Received bulk classification request for {} image URL(s)", len(urls))
+
+        # Upload the requests and create the batch
+        result = await run_in_threadpool(classification_service.submit_bulk, urls)
+
+        # Check for errors
+        if "error" in result:
+            error_message = result["error"]
+            logger.error(error_message)
+            return ORJSONResponse(
+                status_code=500, content=format_error_response(error_message, 500)
+            )
+
+        return format_success_response(result)
+
+    except Exception as e:
+        # Handle unexpected errors
+        raise handle_api_error(e, f"Failed to submit bulk classification: {str(e)}")
+
+
+@router.get("/classify-bulk/{batch_id}")
+async def get_bulk_results(
+    batch_id: str = Path(..., pattern=r"^[A-Za-z0-9_-]+$"),
+    classification_service: ClassificationService = Depends(get_classification_service),
+):
+    """
+    Get the status and results of a bulk classification.
+
+    Args:
+        batch_id: Batch ID returned by the /classify-bulk endpoint
+        classification_service: Shared classification service
+
+    Returns:
+        Batch status, with classification results once the batch has completed
+    """
+    try:
+        logger.info("Received bulk classification status request: {}", batch_id)
+
+        # Get the batch status and results
+        result = await run_in_threadpool(classification_service.get_bulk_results, batch_id)
+
+        # Check for errors
+        if "error" in result:
+            error_message = result["error"]
+            logger.error(error_message)
+            return ORJSONResponse(
+                status_code=500, content=format_error_response(error_message, 500)
+            )
+
+        return format_success_response(result)
+
+    except Exception as e:
+        # Handle unexpected errors
+        raise handle_api_error(e, f"Failed to get bulk classification results: {str(e)}")
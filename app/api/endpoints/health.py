@@ -9,23 +9,83 @@ from app.utils.api_utils import format_success_response
 
 router = APIRouter()
 
+# Time in seconds for which CPU and memory usage are reused
+SYSTEM_INFO_TTL = 1.0
+
+# Time in seconds for which disk usage is reused (disks fill slowly)
+DISK_INFO_TTL = 5.0
+
+# Path of the filesystem whose usage is reported
+DISK_PATH = "/"
+
+# Cached system information tiers and the monotonic time each was collected at
+_fast_cache = {"ts": float("-inf"), "data": {}}
+_slow_cache = {"ts": float("-inf"), "data": {}}
+
+# Prime the CPU counters so that non-blocking calls return a usage delta
+psutil.cpu_percent(interval=None)
+
+# Platform information does not change while the process is running
+_PLATFORM_INFO = {
+    "python_version": platform.python_version(),
+    "platform": platform.platform()
+}
+
+# Configuration reported by the health check (settings do not change at runtime)
+_CONFIG_SNAPSHOT = {
+    "api_host": settings.API_HOST,
+    "api_port": settings.API_PORT,
+    "openai_model": settings.OPENAI_MODEL,
+    "data_dir": settings.DATA_DIR,
+    "log_level": settings.LOG_LEVEL
+}
+
+def _get_cached(cache: dict, ttl: float, collect) -> dict:
+    """
+    Get data from a cache tier, refreshing it if it is older than the TTL.
+    
+    Args:
+        cache: Cache tier with "ts" and "data" keys
+        ttl: Time in seconds for which the data is reused
+        collect: Function that collects fresh data
+        
+    Returns:
+        Cached or freshly collected data
+    """
+    now = time.monotonic()
+    if now - cache["ts"] >= ttl:
+        cache["data"] = collect()
+        cache["ts"] = now
+    return cache["data"]
+
+def _collect_fast_info() -> dict:
+    """Collect CPU and memory usage (non-blocking: CPU usage since the previous call)."""
+    return {
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "memory_percent": psutil.virtual_memory().percent
+    }
+
+def _collect_slow_info() -> dict:
+    """Collect disk usage."""
+    return {"disk_percent": psutil.disk_usage(DISK_PATH).percent}
+
 def get_system_info():
     """
     Get system information.
     
     This function collects information about the system, such as CPU usage,
-    memory usage, and disk usage.
+    memory usage, and disk usage. CPU and memory usage are cached for
+    SYSTEM_INFO_TTL seconds and disk usage for DISK_INFO_TTL seconds, so
+    frequent health polling does not hit psutil on every request.
     
     Returns:
         Dictionary with system information
     """
     try:
         return {
-            "cpu_percent": psutil.cpu_percent(interval=0.1),
-            "memory_percent": psutil.virtual_memory().percent,
-            "disk_percent": psutil.disk_usage("/").percent,
-            "python_version": platform.python_version(),
-            "platform": platform.platform()
+            **_get_cached(_fast_cache, SYSTEM_INFO_TTL, _collect_fast_info),
+            **_get_cached(_slow_cache, DISK_INFO_TTL, _collect_slow_info),
+            **_PLATFORM_INFO
         }
     except Exception as e:
         logger.error(f"Error getting system info: {str(e)}")
@@ -52,13 +112,7 @@ async def health_check():
         "status": "ok",
         "timestamp": time.time(),
         "system_info": system_info,
-        "config": {
-            "api_host": settings.API_HOST,
-            "api_port": settings.API_PORT,
-            "openai_model": settings.OPENAI_MODEL,
-            "data_dir": settings.DATA_DIR,
-            "log_level": settings.LOG_LEVEL
-        }
+        "config": _CONFIG_SNAPSHOT
     }
     
     return format_success_response(health_status)
\ No newline at end of file
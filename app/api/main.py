@@ -1,19 +1,57 @@
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.services.classification import ClassificationService
 
 # Set up logging only once at module level
 setup_logging()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan handler.
+    
+    The code before the yield runs when the FastAPI application starts up:
+    it logs the startup and performs any necessary initialization. The code
+    after the yield runs when the application shuts down and performs cleanup.
+    
+    Args:
+        app: FastAPI application
+    """
+    logger.info("[API] Starting Brand Safety Analysis API on {}:{}", settings.API_HOST, settings.API_PORT)
+    logger.info("[API] OpenAI Model: {}", settings.OPENAI_MODEL)
+    logger.info("[API] Data Directory: {}", settings.DATA_DIR)
+    
+    # Bound the threadpool used for blocking work (image processing, disk I/O)
+    # so bursts queue instead of oversubscribing the CPU. Concurrent OpenAI
+    # calls are bounded separately by OPENAI_CONCURRENCY.
+    to_thread.current_default_thread_limiter().total_tokens = settings.MAX_INFLIGHT
+    logger.info("[API] Max in-flight threadpool tasks: {}", settings.MAX_INFLIGHT)
+    
+    # Create the classification service shared by all requests
+    app.state.classification_service = ClassificationService()
+    
+    yield
+    
+    logger.info("[API] Shutting down Brand Safety Analysis API")
+    
+    # Close the connection pools and flush pending result saves
+    await app.state.classification_service.aclose()
+
 # Create FastAPI app
 app = FastAPI(
     title="Brand Safety Analysis API",
     description="API for classifying images into brand safety categories",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
@@ -45,10 +83,10 @@ async def global_exception_handler(request: Request, exc: Exception):
         exc: Exception that was raised
         
     Returns:
-        JSONResponse with error details
+        ORJSONResponse with error details
     """
-    logger.error(f"Unhandled exception: {str(exc)}")
-    return JSONResponse(
+    logger.error("Unhandled exception: {}", exc)
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -59,34 +97,28 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
-@app.on_event("startup")
-async def startup_event():
-    """
-    Startup event handler.
-    
-    This function is called when the FastAPI application starts up.
-    It logs the startup and performs any necessary initialization.
-    """
-    logger.info(f"[API] Starting Brand Safety Analysis API on {settings.API_HOST}:{settings.API_PORT}")
-    logger.info(f"[API] OpenAI Model: {settings.OPENAI_MODEL}")
-    logger.info(f"[API] Data Directory: {settings.DATA_DIR}")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """
-    Shutdown event handler.
-    
-    This function is called when the FastAPI application shuts down.
-    It logs the shutdown and performs any necessary cleanup.
-    """
-    logger.info("[API] Shutting down Brand Safety Analysis API")
-
 # Run the app
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(
-        "app.api.main:app",
-        host=settings.API_HOST,
-        port=settings.API_PORT,
-        reload=True,
-    )
\ No newline at end of file
+    
+    if settings.DEV:
+        # Auto-reload only works with a single process
+        uvicorn.run(
+            "app.api.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            reload=True,
+            loop="uvloop",
+            http="httptools",
+            access_log=False,
+        )
+    else:
+        uvicorn.run(
+            "app.api.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            workers=settings.API_WORKERS,
+            loop="uvloop",
+            http="httptools",
+            access_log=False,
+        )
\ No newline at end of file
@@ -1,9 +1,6 @@
 import os
-from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+from pydantic import AliasChoices, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     """
@@ -12,26 +9,56 @@ class Settings(BaseSettings):
     These settings are loaded from environment variables and .env file.
     """
     
+    model_config = SettingsConfigDict(env_file=".env", frozen=True, case_sensitive=False)
+    
     # API settings
-    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    # Number of API worker processes. With more than one, each process writes
+    # its own log files, since they would race on rotating shared ones.
+    API_WORKERS: int = Field(
+        default_factory=lambda: (os.cpu_count() or 1) * 2 + 1,
+        validation_alias=AliasChoices("API_WORKERS", "WEB_CONCURRENCY"),
+    )
+    
+    # Development mode (enables auto-reload with a single worker)
+    DEV: bool = False
     
     # OpenAI settings
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o")
+    OPENAI_API_KEY: str = ""
+    OPENAI_MODEL: str = "gpt-4o"
+    OPENAI_CONCURRENCY: int = 8
+    OPENAI_MAX_RETRIES: int = 3
     
     # Image settings
     MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10 MB
-    SUPPORTED_FORMATS: list = ["jpg", "jpeg", "png", "webp"]
+    MAX_IMAGE_PIXELS: int = 64 * 1024 * 1024  # 64 megapixels (decompression bomb guard)
+    SUPPORTED_FORMATS: frozenset = frozenset({"jpg", "jpeg", "png", "webp"})
+    SUPPORTED_MIME_TYPES: frozenset = frozenset({"image/jpeg", "image/jpg", "image/png", "image/webp"})
+    JPEG_QUALITY: int = 85  # quality used when re-encoding normalized images
+    
+    # Object storage for serving images to the model by URL instead of base64
+    # (leave S3_BUCKET empty to send images inline; requires boto3)
+    S3_BUCKET: str = ""
+    S3_PREFIX: str = "uploads/"
+    S3_PRESIGN_EXPIRY: int = 300
+    
+    # Classification result cache
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_TTL: int = 3600
+    
+    # Maximum number of threadpool workers (bounds concurrent blocking work such
+    # as image processing and disk I/O; OpenAI calls are bounded by OPENAI_CONCURRENCY)
+    MAX_INFLIGHT: int = 8
     
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL: str = "INFO"
     
-    # Data directory
-    DATA_DIR: str = os.getenv("DATA_DIR", "data")
+    # Include per-step processing times in classification results
+    EMIT_TIMINGS: bool = True
     
-    class Config:
-        env_file = ".env"
+    # Data directory
+    DATA_DIR: str = "data"
 
 # Create a global settings object
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,10 +1,22 @@
 import sys
 import os
+import glob
+import time
 import logging
 from loguru import logger
 
 from app.core.config import settings
 
+# Cache of standard logging level names to Loguru level names (or numbers)
+_LEVEL_CACHE = {}
+
+# Path of the standard logging module, used to skip its frames
+_LOG_FILE = logging.__file__
+
+# How long rotated log files are kept
+_LOG_RETENTION = "30 days"
+_LOG_RETENTION_SECONDS = 30 * 24 * 60 * 60
+
 # Configure loguru logger
 class InterceptHandler(logging.Handler):
     """
@@ -27,19 +39,88 @@ class InterceptHandler(logging.Handler):
             record (logging.LogRecord): The log record to be processed.
         """
 
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
+        level = _LEVEL_CACHE.get(record.levelname)
+        if level is None:
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            _LEVEL_CACHE[record.levelname] = level
 
         # Find caller from where originated the logged message
         frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
+        while frame.f_code.co_filename == _LOG_FILE:
             frame = frame.f_back
             depth += 1
 
         logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
 
+def is_level_enabled(level: str) -> bool:
+    """
+    Check whether any Loguru sink accepts messages at the given level.
+    
+    This can be used to skip work that is only needed for a log message.
+    
+    Args:
+        level: Loguru level name (e.g. "INFO")
+        
+    Returns:
+        True if messages at this level are emitted, False otherwise
+    """
+    return logger._core.min_level <= logger.level(level).no
+
+def _add_file_sinks(suffix: str = ""):
+    """
+    Add the rotating log files for all logs and for errors.
+    
+    Args:
+        suffix: Suffix of the log file names (e.g. "-1234" for per-process files)
+    """
+    # Create logs directory if it doesn't exist
+    os.makedirs("logs", exist_ok=True)
+    
+    # Add file handler for all logs (centralized log file)
+    logger.add(
+        f"logs/app{suffix}.log",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+        level=settings.LOG_LEVEL,
+        rotation="100 MB",
+        compression="gz",
+        retention=_LOG_RETENTION,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
+    
+    # Add file handler for errors and above
+    logger.add(
+        f"logs/error{suffix}.log",
+        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
+        level="ERROR",
+        rotation="100 MB",
+        compression="gz",
+        retention=_LOG_RETENTION,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
+
+def _remove_stale_process_logs():
+    """
+    Remove per-process log files older than the retention period.
+    
+    Loguru only applies retention to the files of the running process, so the
+    files of earlier worker processes are cleaned up here.
+    """
+    cutoff = time.time() - _LOG_RETENTION_SECONDS
+    for path in glob.glob("logs/app-*.log*") + glob.glob("logs/error-*.log*"):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            # Removed by another worker at the same time
+            pass
+
 # Flag to track if logging has been set up
 _logging_initialized = False
 
@@ -48,7 +129,10 @@ def setup_logging():
     Set up logging configuration.
     
     This function configures Loguru and intercepts standard logging messages.
-    It sets up a centralized log file for all logs.
+    It sets up a centralized log file for all logs and one for errors. When
+    the API runs several worker processes, each writes its own files
+    (app-<pid>.log and error-<pid>.log), since the processes would race on
+    rotating shared files.
     
     The function ensures logging is only set up once to prevent duplicate logs.
     """
@@ -59,39 +143,27 @@ def setup_logging():
         logger.debug("Logging already initialized, skipping setup")
         return
     
-    # Create logs directory if it doesn't exist
-    os.makedirs("logs", exist_ok=True)
-    
     # Remove default loguru handler
     logger.remove()
     
+    # All sinks use enqueue=True so records are written from a background
+    # thread and logging never blocks the event loop
+    
     # Add new handler with custom format for console output
     logger.add(
         sys.stderr,
         format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
         level=settings.LOG_LEVEL,
         colorize=True,
+        enqueue=True,
     )
     
-    # Add file handler for all logs (centralized log file)
-    logger.add(
-        "logs/app.log",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-        level=settings.LOG_LEVEL,
-        rotation="10 MB",
-        compression="zip",
-        retention="30 days",
-    )
-    
-    # Add file handler for errors and above
-    logger.add(
-        "logs/error.log",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-        level="ERROR",
-        rotation="10 MB",
-        compression="zip",
-        retention="30 days",
-    )
+    # Add the log files, one set per process if there are several API workers
+    if settings.API_WORKERS > 1:
+        _remove_stale_process_logs()
+        _add_file_sinks(f"-{os.getpid()}")
+    else:
+        _add_file_sinks()
     
     # Intercept standard logging messages
     logging.basicConfig(handlers=[InterceptHandler()], level=0)
@@ -102,6 +174,10 @@ def setup_logging():
         _logger.handlers = [InterceptHandler()]
         _logger.propagate = False  # Prevent propagation to avoid duplicate logs
     
+    # Drop per-request access logs; the endpoints already log each request
+    # with its timing, so only warnings and above are worth intercepting
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
+    
     logger.info("[LOGGING] Logging configured successfully")
     
     # Mark logging as initialized
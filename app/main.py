@@ -1,12 +1,10 @@
 import json
-import csv
-import requests
+import httpx
 import streamlit as st
 from PIL import Image
 import io
 import os
 import sys
-from io import StringIO
 from loguru import logger
 
 # Add the project root to the Python path to make app imports work
@@ -14,6 +12,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 # Now we can import from app
 from app.core.logging import setup_logging
+from app.utils.csv_utils import format_csv_row
 
 # Set up logging using the centralized logging configuration
 setup_logging()
@@ -28,6 +27,72 @@ st.set_page_config(
 # API endpoints
 API_URL = "http://localhost:8000/api/v1"
 
+# Timeout for classification requests. The API retries OpenAI calls with
+# backoff, so a successful classification can take several minutes; only the
+# connection attempt is bounded.
+CLASSIFY_TIMEOUT = httpx.Timeout(None, connect=5.0)
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """
+    Get the shared HTTP client.
+    
+    The client is cached across Streamlit reruns so that calls to the API and
+    image downloads reuse pooled keep-alive connections. Its default timeout
+    applies to image downloads; classification requests use CLASSIFY_TIMEOUT.
+    
+    Returns:
+        Shared httpx client
+    """
+    return httpx.Client(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=10),
+        follow_redirects=True,
+    )
+
+# Brand safety categories as (display name, rating key) pairs
+CATEGORIES = (
+    ("Adult Content", "adultContentRating"),
+    ("Drugs Content", "drugsContentRating"),
+    ("Alcohol Content", "alcoholContentRating"),
+    ("Hate Speech", "hateSpeechRating"),
+    ("Arms and Ammunition", "armsAndAmmunitionRating"),
+    ("Death, Injury, or Military Conflict", "deathInjuryOrMilitaryConflictRating"),
+    ("Terrorism", "terrorismRating"),
+    ("Obscenity and Profanity", "obscenityAndProfanityRating"),
+)
+
+# (display name, rating key, confidence key, explanation key) for each category
+_CATEGORY_KEYS = tuple(
+    (display_name, key, f"{key}_confidence_score", f"{key}_explanation")
+    for display_name, key in CATEGORIES
+)
+
+# Header row of the CSV export
+_CSV_HEADER = "Category,Rating,Confidence Score,Explanation\r\n"
+
+# Size the image previews are decoded at (JPEGs only)
+PREVIEW_SIZE = (1024, 1024)
+
+def load_preview_image(source) -> Image.Image:
+    """
+    Load an image for preview.
+    
+    JPEG images are decoded at a reduced scale with draft(), since the preview
+    is downscaled for display anyway. Other formats are loaded as-is.
+    
+    Args:
+        source: File path or file-like object with the image data
+        
+    Returns:
+        Loaded PIL image
+    """
+    image = Image.open(source)
+    if image.format == "JPEG":
+        image.draft("RGB", PREVIEW_SIZE)
+    image.load()
+    return image
+
 def main():
     """
     Main function for the Streamlit UI.
@@ -53,7 +118,7 @@ def main():
         
         if uploaded_file is not None:
             # Display the uploaded image
-            image = Image.open(uploaded_file)
+            image = load_preview_image(uploaded_file)
             st.image(image, caption="Uploaded Image", use_column_width=True)
             
             # Classify the image when the button is clicked
@@ -64,7 +129,9 @@ def main():
                         files = {"file": (uploaded_file.name, uploaded_file.getvalue(), "image/jpeg")}
                         
                         # Call the API
-                        response = requests.post(f"{API_URL}/classify", files=files)
+                        response = get_http_client().post(
+                            f"{API_URL}/classify", files=files, timeout=CLASSIFY_TIMEOUT
+                        )
                         
                         # Display the results
                         if response.status_code == 200:
@@ -80,9 +147,13 @@ def main():
         
         if image_url:
             try:
-                # Display the image from URL
-                response = requests.get(image_url)
-                image = Image.open(io.BytesIO(response.content))
+                # Display the image from URL, streaming the download into memory
+                buffer = io.BytesIO()
+                with get_http_client().stream("GET", image_url) as response:
+                    for chunk in response.iter_bytes():
+                        buffer.write(chunk)
+                buffer.seek(0)
+                image = load_preview_image(buffer)
                 st.image(image, caption="Image from URL", use_column_width=True)
                 
                 # Extract filename from URL
@@ -93,9 +164,10 @@ def main():
                     with st.spinner("Analyzing image..."):
                         try:
                             # Call the API
-                            response = requests.post(
+                            response = get_http_client().post(
                                 f"{API_URL}/classify-url",
-                                json={"url": image_url}
+                                json={"url": image_url},
+                                timeout=CLASSIFY_TIMEOUT
                             )
                             
                             # Display the results
@@ -133,29 +205,17 @@ def display_results(response, filename):
     # Create columns for categories
     col1, col2 = st.columns(2)
     
-    # Display results in a structured format
-    categories = [
-        ("Adult Content", "adultContentRating"),
-        ("Drugs Content", "drugsContentRating"),
-        ("Alcohol Content", "alcoholContentRating"),
-        ("Hate Speech", "hateSpeechRating"),
-        ("Arms and Ammunition", "armsAndAmmunitionRating"),
-        ("Death, Injury, or Military Conflict", "deathInjuryOrMilitaryConflictRating"),
-        ("Terrorism", "terrorismRating"),
-        ("Obscenity and Profanity", "obscenityAndProfanityRating"),
-    ]
-    
     # Display categories in two columns
-    for i, (display_name, key) in enumerate(categories):
+    for i, (display_name, key, confidence_key, explanation_key) in enumerate(_CATEGORY_KEYS):
         col = col1 if i < 4 else col2
         
         with col:
             st.markdown(f"### {display_name}")
             
             # Get values with fallbacks
-            rating = results.get(f"{key}", "N/A")
-            confidence = results.get(f"{key}_confidence_score", "N/A")
-            explanation = results.get(f"{key}_explanation", "No explanation provided")
+            rating = results.get(key, "N/A")
+            confidence = results.get(confidence_key, "N/A")
+            explanation = results.get(explanation_key, "No explanation provided")
             
             # Display rating with color
             if rating == "low":
@@ -214,44 +274,18 @@ def convert_to_csv(results):
     Returns:
         CSV data as string
     """
-    # Create a list to hold the rows
-    rows = []
-    
-    # Add header row
-    rows.append(["Category", "Rating", "Confidence Score", "Explanation"])
-    
-    # Map of key prefixes to display names
-    category_map = {
-        "adultContent": "Adult Content",
-        "drugsContent": "Drugs Content",
-        "alcoholContent": "Alcohol Content",
-        "hateSpeech": "Hate Speech",
-        "armsAndAmmunition": "Arms and Ammunition",
-        "deathInjuryOrMilitaryConflict": "Death, Injury, or Military Conflict",
-        "terrorism": "Terrorism",
-        "obscenityAndProfanity": "Obscenity and Profanity"
-    }
-    
-    # Add data rows
-    for key_prefix, display_name in category_map.items():
-        rating_key = f"{key_prefix}Rating"
-        confidence_key = f"{rating_key}_confidence_score"
-        explanation_key = f"{rating_key}_explanation"
-        
-        if rating_key in results:
-            rows.append([
-                display_name,
-                results.get(rating_key, "N/A"),
-                results.get(confidence_key, "N/A"),
-                results.get(explanation_key, "No explanation provided")
-            ])
-    
-    # Convert to CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerows(rows)
+    rows = [
+        format_csv_row((
+            display_name,
+            results.get(key, "N/A"),
+            results.get(confidence_key, "N/A"),
+            results.get(explanation_key, "No explanation provided")
+        ))
+        for display_name, key, confidence_key, explanation_key in _CATEGORY_KEYS
+        if key in results
+    ]
     
-    return output.getvalue()
+    return _CSV_HEADER + "".join(rows)
 
 if __name__ == "__main__":
     logger.info("[STREAMLIT] Starting Brand Safety Analysis Streamlit UI")
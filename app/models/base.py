@@ -27,6 +27,32 @@ class BaseModel(ABC):
         """
         Classify an image from a URL into brand safety categories.
         
+        Args:
+            image_url: URL of the image
+            
+        Returns:
+            Dictionary with classification results for all brand safety categories
+        """
+        pass
+    
+    @abstractmethod
+    async def aclassify_image(self, image_path: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify an image into brand safety categories.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Dictionary with classification results for all brand safety categories
+        """
+        pass
+    
+    @abstractmethod
+    async def aclassify_image_url(self, image_url: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify an image from a URL into brand safety categories.
+        
         Args:
             image_url: URL of the image
             
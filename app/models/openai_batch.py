@@ -0,0 +1,177 @@
+import os
+import uuid
+import tempfile
+from typing import Dict, Any, List
+
+from openai import OpenAI
+from openai.types.chat import ChatCompletion
+from loguru import logger
+import orjson
+
+from app.core.config import settings
+from app.models.openai_model import OpenAIModel, RESPONSE_FORMAT
+
+class OpenAIBatch:
+    """
+    OpenAI Batch API client for offline bulk classification.
+
+    This class submits classification requests through the OpenAI Batch API,
+    which processes them asynchronously within a 24 hour window at a lower cost
+    than real-time requests. The mapping from request IDs to image sources is
+    stored in the data directory so results can be collected later.
+    """
+
+    def __init__(self, model: OpenAIModel):
+        """
+        Initialize the batch client.
+
+        Args:
+            model: OpenAI model used to build the request messages and parse responses
+        """
+        self.model = model
+        self.client: OpenAI = model.client
+        self.batches_dir = os.path.join(settings.DATA_DIR, "batches")
+
+    def _get_image_url(self, source: str) -> str:
+        """
+        Get the image URL to send for an image source.
+
+        Args:
+            source: Image URL or path to an image file
+
+        Returns:
+            The URL itself, or a base64 data URL for local files
+        """
+        if source.startswith(("http://", "https://")):
+            return source
+        return f"data:image/jpeg;base64,{self.model._encode_image(source)}"
+
+    def _get_mapping_path(self, batch_id: str) -> str:
+        """
+        Get the path of the file mapping request IDs to image sources for a batch.
+
+        Args:
+            batch_id: OpenAI batch ID
+
+        Returns:
+            Path to the mapping file
+        """
+        return os.path.join(self.batches_dir, f"{batch_id}.json")
+
+    def submit_batch(self, sources: List[str]) -> Dict[str, Any]:
+        """
+        Submit a batch of images for classification.
+
+        The requests are streamed to a temporary JSONL file one line at a time,
+        uploaded, and submitted as a batch against the chat completions endpoint.
+
+        Args:
+            sources: Image URLs or paths to image files
+
+        Returns:
+            Dictionary with the batch ID, status, and number of requests
+        """
+        os.makedirs(self.batches_dir, exist_ok=True)
+        
+        custom_ids = {}
+        with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as f:
+            input_path = f.name
+            for source in sources:
+                custom_id = uuid.uuid4().hex
+                custom_ids[custom_id] = source
+                request = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": self.model.model,
+                        "messages": self.model._build_messages(self._get_image_url(source)),
+                        "max_tokens": 2000,
+                        "response_format": RESPONSE_FORMAT
+                    }
+                }
+                f.write(orjson.dumps(request) + b"\n")
+
+        try:
+            with open(input_path, "rb") as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+        finally:
+            os.remove(input_path)
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+        # Remember which image each request belongs to
+        with open(self._get_mapping_path(batch.id), "wb") as f:
+            f.write(orjson.dumps(custom_ids))
+
+        logger.info(f"Submitted batch {batch.id} with {len(sources)} request(s)")
+        return {
+            "batch_id": batch.id,
+            "status": batch.status,
+            "request_count": len(sources)
+        }
+
+    def poll_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get the status of a batch and its results once it has completed.
+
+        Args:
+            batch_id: OpenAI batch ID
+
+        Returns:
+            Dictionary with the batch status and, if completed, the classification
+            results keyed by image source
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        status = {
+            "batch_id": batch.id,
+            "status": batch.status
+        }
+        if batch.request_counts is not None:
+            status["request_counts"] = batch.request_counts.model_dump()
+
+        if batch.status != "completed":
+            return status
+
+        with open(self._get_mapping_path(batch_id), "rb") as f:
+            custom_ids = orjson.loads(f.read())
+
+        # Demultiplex the output and error lines by request ID (requests that
+        # failed are only listed in the error file)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                self._collect_results(self.client.files.content(file_id).text, custom_ids, results)
+
+        logger.info(f"Collected {len(results)} result(s) from batch {batch_id}")
+        status["results"] = results
+        return status
+
+    def _collect_results(self, content: str, custom_ids: Dict[str, str], results: Dict[str, Any]) -> None:
+        """
+        Parse the lines of a batch output or error file into classification results.
+
+        Args:
+            content: JSONL content of the file
+            custom_ids: Mapping from request IDs to image sources
+            results: Dictionary to add the results to, keyed by image source
+        """
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            source = custom_ids.get(record["custom_id"], record["custom_id"])
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                results[source] = {
+                    "image_path": source,
+                    "error": str(record.get("error") or response.get("body"))
+                }
+                continue
+            results[source] = self.model._process_response(
+                ChatCompletion.model_validate(response["body"]), source
+            )
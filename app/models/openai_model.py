@@ -1,14 +1,53 @@
-import base64
-import json
+import re
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List
 
-from openai import OpenAI
+from anyio import to_thread
+import httpx
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
 from loguru import logger
+import orjson
+import pybase64 as base64
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 from app.core.config import settings
 from app.models.base import BaseModel
-from app.prompts.openai_prompts import get_classification_prompt
+from app.prompts.openai_prompts import CLASSIFICATION_PROMPT
+from app.utils.timing_utils import Timer, new_timings, rounded_timings
+
+# Ask the model for a bare JSON object instead of JSON wrapped in Markdown
+RESPONSE_FORMAT = {"type": "json_object"}
+
+# Markdown code fence around the JSON in a model response
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+# Parts of the classification messages that are the same for every request
+# (shared between requests, so they must not be modified)
+SYSTEM_MESSAGE = {"role": "system", "content": CLASSIFICATION_PROMPT}
+USER_TEXT_PART = {"type": "text", "text": "Please classify this image for brand safety:"}
+
+# Connection pool and timeouts for the OpenAI clients. HTTP/2 multiplexes
+# concurrent requests over a few connections instead of queueing them.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+
+# Transient OpenAI errors that are worth retrying
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# Retry policy for OpenAI API calls: exponential backoff with jitter on transient errors
+api_retry = retry(
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    stop=stop_after_attempt(settings.OPENAI_MAX_RETRIES),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    reraise=True,
+)
 
 class OpenAIModel(BaseModel):
     """
@@ -19,15 +58,33 @@ class OpenAIModel(BaseModel):
     """
     
     def __init__(self):
-        """Initialize the OpenAI client with API key from settings."""
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Initialize the sync and async OpenAI clients with API key from settings."""
+        # Retries are handled by api_retry
+        self.client = OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=0,
+            http_client=httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        )
+        self.aclient = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            max_retries=0,
+            http_client=httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        )
         self.model = settings.OPENAI_MODEL
         logger.info(f"Initialized OpenAI model: {self.model}")
     
+    async def aclose(self) -> None:
+        """Close the connection pools of the sync and async OpenAI clients."""
+        self.client.close()
+        await self.aclient.close()
+    
     def _encode_image(self, image_path: str) -> str:
         """
         Encode an image as base64.
         
+        Uses pybase64 (SIMD-accelerated) for encoding; the base64 alphabet is
+        ASCII, so decoding as ASCII is sufficient.
+        
         Args:
             image_path: Path to the image file
             
@@ -35,7 +92,7 @@ class OpenAIModel(BaseModel):
             Base64 encoded image
         """
         with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode("utf-8")
+            return base64.b64encode(image_file.read()).decode("ascii")
     
     def classify_image(self, image_path: str) -> Dict[str, Any]:
         """
@@ -48,59 +105,30 @@ class OpenAIModel(BaseModel):
             Dictionary with classification results
         """
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
+            times = new_timings()
             logger.info(f"Classifying image: {image_path}")
             
             # Encode the image
-            encode_start = time.time()
-            base64_image = self._encode_image(image_path)
-            encode_time = time.time() - encode_start
-            logger.debug(f"Image encoding took {encode_time:.2f} seconds")
-            
-            # Get the prompt
-            system_prompt = get_classification_prompt()
+            with Timer(times, "encode_seconds"):
+                base64_image = self._encode_image(image_path)
             
             # Call the OpenAI API
-            api_start = time.time()
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Please classify this image for brand safety:"},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=2000
-            )
-            api_time = time.time() - api_start
-            logger.info(f"OpenAI API request took {api_time:.2f} seconds")
+            with Timer(times, "api_seconds"):
+                response = self._call_api(self._build_messages(f"data:image/jpeg;base64,{base64_image}"))
             
             # Process the response
-            process_start = time.time()
-            result = self._process_response(response, image_path)
-            process_time = time.time() - process_start
-            logger.debug(f"Response processing took {process_time:.2f} seconds")
+            with Timer(times, "process_seconds"):
+                result = self._process_response(response, image_path)
             
             # Calculate total time
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             logger.info(f"Successfully classified image: {image_path} in {total_time:.2f} seconds")
             
             # Add timing information to result
-            result["processing_time"] = {
-                "total_seconds": round(total_time, 2),
-                "api_seconds": round(api_time, 2),
-                "encode_seconds": round(encode_time, 2),
-                "process_seconds": round(process_time, 2)
-            }
+            if times is not None:
+                times["total_seconds"] = total_time
+                result["processing_time"] = rounded_timings(times)
             
             return result
             
@@ -119,52 +147,166 @@ class OpenAIModel(BaseModel):
             Dictionary with classification results
         """
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
+            times = new_timings()
             logger.info(f"Classifying image URL: {image_url}")
             
-            # Get the prompt
-            system_prompt = get_classification_prompt()
-            
             # Call the OpenAI API
-            api_start = time.time()
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": "Please classify this image for brand safety:"},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": image_url
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=2000
-            )
-            api_time = time.time() - api_start
-            logger.info(f"OpenAI API request took {api_time:.2f} seconds")
+            with Timer(times, "api_seconds"):
+                response = self._call_api(self._build_messages(image_url))
             
             # Process the response
-            process_start = time.time()
-            result = self._process_response(response, image_url)
-            process_time = time.time() - process_start
-            logger.debug(f"Response processing took {process_time:.2f} seconds")
+            with Timer(times, "process_seconds"):
+                result = self._process_response(response, image_url)
             
             # Calculate total time
-            total_time = time.time() - start_time
+            total_time = time.perf_counter() - start_time
             logger.info(f"Successfully classified image URL: {image_url} in {total_time:.2f} seconds")
             
             # Add timing information to result
-            result["processing_time"] = {
-                "total_seconds": round(total_time, 2),
-                "api_seconds": round(api_time, 2),
-                "process_seconds": round(process_time, 2)
+            if times is not None:
+                times["total_seconds"] = total_time
+                result["processing_time"] = rounded_timings(times)
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error classifying image URL: {str(e)}")
+            raise
+    
+    def _build_messages(self, image_url: str) -> List[Dict[str, Any]]:
+        """
+        Build the chat messages for a classification request.
+        
+        Only the image part is built per call; the system message and the
+        text part are shared constants.
+        
+        Args:
+            image_url: URL of the image (or base64 data URL)
+            
+        Returns:
+            List of chat messages
+        """
+        return [
+            SYSTEM_MESSAGE,
+            {
+                "role": "user",
+                "content": [USER_TEXT_PART, {"type": "image_url", "image_url": {"url": image_url}}]
             }
+        ]
+    
+    @api_retry
+    def _call_api(self, messages: List[Dict[str, Any]]):
+        """
+        Call the OpenAI API, retrying transient errors.
+        
+        Args:
+            messages: Chat messages
+            
+        Returns:
+            OpenAI API response
+        """
+        return self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=2000,
+            response_format=RESPONSE_FORMAT
+        )
+    
+    @api_retry
+    async def _acall_api(self, messages: List[Dict[str, Any]]):
+        """
+        Call the OpenAI API asynchronously, retrying transient errors.
+        
+        Args:
+            messages: Chat messages
+            
+        Returns:
+            OpenAI API response
+        """
+        return await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=2000,
+            response_format=RESPONSE_FORMAT
+        )
+    
+    async def aclassify_image(self, image_path: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify an image into brand safety categories.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Dictionary with classification results
+        """
+        try:
+            start_time = time.perf_counter()
+            times = new_timings()
+            logger.info(f"Classifying image: {image_path}")
+            
+            # Encode the image in a worker thread (bounded by the anyio thread limiter)
+            # to keep file I/O off the event loop
+            with Timer(times, "encode_seconds"):
+                base64_image = await to_thread.run_sync(self._encode_image, image_path)
+            
+            # Call the OpenAI API
+            with Timer(times, "api_seconds"):
+                response = await self._acall_api(
+                    self._build_messages(f"data:image/jpeg;base64,{base64_image}")
+                )
+            
+            # Process the response
+            with Timer(times, "process_seconds"):
+                result = self._process_response(response, image_path)
+            
+            # Calculate total time
+            total_time = time.perf_counter() - start_time
+            logger.info(f"Successfully classified image: {image_path} in {total_time:.2f} seconds")
+            
+            # Add timing information to result
+            if times is not None:
+                times["total_seconds"] = total_time
+                result["processing_time"] = rounded_timings(times)
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error classifying image: {str(e)}")
+            raise
+    
+    async def aclassify_image_url(self, image_url: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify an image from a URL into brand safety categories.
+        
+        Args:
+            image_url: URL of the image
+            
+        Returns:
+            Dictionary with classification results
+        """
+        try:
+            start_time = time.perf_counter()
+            times = new_timings()
+            logger.info(f"Classifying image URL: {image_url}")
+            
+            # Call the OpenAI API
+            with Timer(times, "api_seconds"):
+                response = await self._acall_api(self._build_messages(image_url))
+            
+            # Process the response
+            with Timer(times, "process_seconds"):
+                result = self._process_response(response, image_url)
+            
+            # Calculate total time
+            total_time = time.perf_counter() - start_time
+            logger.info(f"Successfully classified image URL: {image_url} in {total_time:.2f} seconds")
+            
+            # Add timing information to result
+            if times is not None:
+                times["total_seconds"] = total_time
+                result["processing_time"] = rounded_timings(times)
             
             return result
             
@@ -189,23 +331,23 @@ class OpenAIModel(BaseModel):
             
             # Try to parse the JSON response
             try:
-                # Extract JSON from the response (it might be wrapped in markdown code blocks)
-                if "```json" in content:
-                    json_str = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    json_str = content.split("```")[1].strip()
-                else:
-                    json_str = content.strip()
+                # JSON mode returns a bare object; fall back to extracting it
+                # from a Markdown code fence
+                json_str = content.strip()
+                if not json_str.startswith("{"):
+                    match = _JSON_FENCE.search(content)
+                    if match:
+                        json_str = match.group(1)
                 
                 # Parse the JSON
-                result = json.loads(json_str)
+                result = orjson.loads(json_str)
                 
                 # Add the image path to the result
                 result["image_path"] = image_path
                 
                 return result
                 
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.error(f"Failed to parse JSON response: {content}")
                 
                 # If JSON parsing fails, create a basic response
@@ -5,14 +5,8 @@ This module contains prompt templates for the OpenAI Vision model
 used for brand safety classification.
 """
 
-def get_classification_prompt() -> str:
-    """
-    Get the system prompt for image classification.
-    
-    Returns:
-        System prompt string for brand safety classification
-    """
-    return """
+# System prompt for brand safety classification
+CLASSIFICATION_PROMPT = """
     You are an expert in brand safety analysis for digital advertising. Your task is to analyze the provided image and classify it according to the following brand safety categories based on IAB and GARM frameworks:
 
     1. Adult Content: genitalia, sexual activity, nudity, buttocks, sex toys
@@ -58,4 +52,13 @@ def get_classification_prompt() -> str:
     }
 
     Be thorough in your analysis and provide clear explanations for each category.
-    """
\ No newline at end of file
+    """
+
+def get_classification_prompt() -> str:
+    """
+    Get the system prompt for image classification.
+    
+    Returns:
+        System prompt string for brand safety classification
+    """
+    return CLASSIFICATION_PROMPT
@@ -1,13 +1,43 @@
 import os
-import json
 import time
-from typing import Dict, Any, Tuple
+import asyncio
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
 
+from anyio import to_thread
+from cachetools import TTLCache
 from loguru import logger
+import orjson
 
 from app.models.openai_model import OpenAIModel
+from app.models.openai_batch import OpenAIBatch
 from app.services.image_processor import ImageProcessor
 from app.core.config import settings
+from app.prompts.openai_prompts import CLASSIFICATION_PROMPT
+from app.utils.storage_utils import get_presigned_image_url
+from app.utils.timing_utils import Timer, new_timings, rounded_timings
+
+# Block size for hashing uploaded files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def _disk_cache_namespace(model: str, prompt: str) -> str:
+    """
+    Get the on-disk cache namespace for a model and prompt.
+    
+    Results are cached under this namespace, so changing the model or the
+    prompt starts from an empty cache instead of returning stale results.
+    
+    Args:
+        model: OpenAI model name
+        prompt: Classification prompt
+        
+    Returns:
+        Hex digest of the model name and prompt
+    """
+    return hashlib.blake2b(f"{model}\0{prompt}".encode(), digest_size=8).hexdigest()
 
 class ClassificationService:
     """
@@ -20,71 +50,295 @@ class ClassificationService:
     def __init__(self):
         """Initialize the classification service with the OpenAI model and image processor."""
         self.model = OpenAIModel()
+        self.batch = OpenAIBatch(self.model)
         self.image_processor = ImageProcessor()
+        
+        # Cache of classification results keyed on image content hash or URL.
+        # The lock is needed because the service is shared by threadpool workers.
+        self._result_cache = TTLCache(maxsize=settings.RESULT_CACHE_SIZE, ttl=settings.RESULT_CACHE_TTL)
+        self._result_cache_lock = threading.Lock()
+        
+        # Persistent cache of results for image content hashes, shared across
+        # restarts and worker processes (one directory per model and prompt)
+        self.cache_dir = os.path.join(
+            settings.DATA_DIR, "cache", _disk_cache_namespace(settings.OPENAI_MODEL, CLASSIFICATION_PROMPT)
+        )
+        
+        # Background writer for results files, so disk I/O stays off the request path
+        self._save_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="save-results")
+        
+        # In-flight async classifications by cache key, so concurrent requests
+        # for the same image share one API call
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        
+        # Bound on concurrent OpenAI API calls, shared by all requests (only the
+        # API call holds it, so image processing overlaps other calls)
+        self._api_limiter = asyncio.Semaphore(settings.OPENAI_CONCURRENCY)
         logger.info("Initialized ClassificationService")
     
-    def classify_uploaded_image(self, file) -> Dict[str, Any]:
+    @staticmethod
+    def _content_key(data: bytes) -> str:
         """
-        Classify an uploaded image.
+        Get the cache key for image content.
         
-        This method processes the uploaded image and classifies it using the OpenAI model.
-        The results are also saved to a JSON file in the data directory.
+        Args:
+            data: Raw image bytes
+            
+        Returns:
+            Hex digest of the image bytes
+        """
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _file_content_key(file_obj) -> str:
+        """
+        Get the cache key for the content of a file object, reading it in blocks.
+        
+        The file object is rewound afterwards.
         
         Args:
-            file: Uploaded file object
+            file_obj: Binary file object positioned at the start of the content
+            
+        Returns:
+            Hex digest of the file content (same as _content_key of its bytes)
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+        file_obj.seek(0)
+        return hasher.hexdigest()
+    
+    def _get_cached_result(self, key: Hashable, persistent: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached classification result.
+        
+        Args:
+            key: Cache key
+            persistent: Whether to fall back to the on-disk cache (content keys only);
+                results older than RESULT_CACHE_TTL are removed instead of returned
+            
+        Returns:
+            Copy of the cached result, or None if there is no cached result
+        """
+        with self._result_cache_lock:
+            result = self._result_cache.get(key)
+        if result is not None:
+            return dict(result)
+        
+        if persistent:
+            cache_path = os.path.join(self.cache_dir, f"{key}.json")
+            try:
+                with open(cache_path, "rb") as f:
+                    expired = time.time() - os.fstat(f.fileno()).st_mtime > settings.RESULT_CACHE_TTL
+                    if not expired:
+                        result = orjson.loads(f.read())
+            except (FileNotFoundError, orjson.JSONDecodeError):
+                return None
+            
+            # Remove expired results so the cache does not grow without bound
+            if expired:
+                try:
+                    os.remove(cache_path)
+                except FileNotFoundError:
+                    pass
+                return None
+            
+            with self._result_cache_lock:
+                self._result_cache[key] = result
+            return dict(result)
+        
+        return None
+    
+    def _cache_result(self, key: Hashable, result: Dict[str, Any], persistent: bool = False) -> None:
+        """
+        Cache a classification result.
+        
+        Results that contain an error are not cached.
+        
+        Args:
+            key: Cache key
+            result: Classification results
+            persistent: Whether to also write the result to the on-disk cache (content keys only)
+        """
+        if "error" in result:
+            return
+        with self._result_cache_lock:
+            self._result_cache[key] = dict(result)
+        
+        if persistent:
+            temp_path = None
+            try:
+                # Write to a temporary file and rename it into place, so readers
+                # never see a partially written result
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with tempfile.NamedTemporaryFile("wb", dir=self.cache_dir, suffix=".tmp", delete=False) as f:
+                    temp_path = f.name
+                    f.write(orjson.dumps(result))
+                os.replace(temp_path, os.path.join(self.cache_dir, f"{key}.json"))
+            except Exception as e:
+                logger.warning(f"Failed to write classification result to disk cache: {str(e)}")
+                if temp_path is not None:
+                    try:
+                        os.remove(temp_path)
+                    except FileNotFoundError:
+                        pass
+    
+    def _classify_local_image(self, image_path: str) -> Dict[str, Any]:
+        """
+        Classify a processed image stored in the data directory.
+        
+        If object storage is configured, the image is uploaded and the model
+        fetches it by presigned URL; otherwise it is sent base64-encoded.
+        
+        Args:
+            image_path: Path to the image file
+            
+        Returns:
+            Classification results
+        """
+        presigned_url = get_presigned_image_url(image_path)
+        if presigned_url is None:
+            return self.model.classify_image(image_path)
+        
+        result = self.model.classify_image_url(presigned_url)
+        result["image_path"] = image_path
+        return result
+    
+    async def _aclassify_local_image(self, image_path: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify a processed image stored in the data directory.
+        
+        Args:
+            image_path: Path to the image file
             
         Returns:
             Classification results
         """
-        start_time = time.time()
+        presigned_url = await to_thread.run_sync(get_presigned_image_url, image_path)
+        if presigned_url is None:
+            return await self.model.aclassify_image(image_path)
+        
+        result = await self.model.aclassify_image_url(presigned_url)
+        result["image_path"] = image_path
+        return result
+    
+    def _finish_classification(
+        self, result: Dict[str, Any], image_path: str, kind: str, source: str,
+        start_time: float, times: Optional[Dict[str, float]]
+    ) -> None:
+        """
+        Log a successful classification, add the service timings and save the results.
+        
+        The results file is written in the background, so disk I/O stays off
+        the request path.
+        
+        Args:
+            result: Classification results (updated in place)
+            image_path: Path to the processed image file
+            kind: Kind of image source for log messages ('uploaded image' or 'image URL')
+            source: Original filename or URL of the image
+            start_time: perf_counter value at the start of the classification
+            times: Step timings, or None if timings are disabled
+        """
+        # Calculate total service time
+        total_time = time.perf_counter() - start_time
+        # Include both the original source and the UUID filename in the log
+        logger.info(f"[SERVICE] Successfully classified {kind} '{source}' (saved as {os.path.basename(image_path)}) in {total_time:.2f} seconds")
+        
+        # Add service timing information to result
+        if times is not None:
+            times["service_total_seconds"] = total_time
+            result.setdefault("processing_time", {}).update(rounded_timings(times))
+        
+        # Save the results to a JSON file in the background
+        self._save_pool.submit(self._save_results_to_file, result, image_path)
+    
+    def _classify(
+        self, kind: str, source: str, cache_key: Hashable, persistent: bool,
+        process: Callable[[], Tuple[str, bool]]
+    ) -> Dict[str, Any]:
+        """
+        Classify an image: look up the cache, process the image, classify it and cache the result.
+        
+        Args:
+            kind: Kind of image source for messages ('uploaded image' or 'image URL')
+            source: Original filename or URL of the image
+            cache_key: Cache key of the image
+            persistent: Whether to also use the on-disk cache (content keys only)
+            process: Function that processes the image and returns (image path, success flag)
+            
+        Returns:
+            Classification results
+        """
+        start_time = time.perf_counter()
+        times = new_timings()
         try:
-            logger.info(f"Classifying uploaded image: {file.filename}")
+            logger.info(f"Classifying {kind}: {source}")
             
-            # Process the uploaded image
-            process_start = time.time()
-            image_path, success = self.image_processor.process_uploaded_image(file)
-            process_time = time.time() - process_start
-            logger.debug(f"Image processing took {process_time:.2f} seconds")
+            # Return the cached result if this image was classified before
+            cached_result = self._get_cached_result(cache_key, persistent)
+            if cached_result is not None:
+                logger.info(f"[SERVICE] Returning cached classification for {kind} '{source}'")
+                return cached_result
+            
+            # Process the image
+            with Timer(times, "image_processing_seconds"):
+                image_path, success = process()
             
             if not success:
-                error_message = f"Failed to process the uploaded image: {file.filename}"
+                error_message = f"Failed to process the {kind}: {source}"
                 logger.error(error_message)
                 return {"error": error_message}
             
             # Classify the image
-            classify_start = time.time()
-            result = self.model.classify_image(image_path)
-            classify_time = time.time() - classify_start
-            logger.debug(f"Image classification took {classify_time:.2f} seconds")
-            
-            # Save the results to a JSON file
-            save_start = time.time()
-            self._save_results_to_file(result, image_path)
-            save_time = time.time() - save_start
-            logger.debug(f"Saving results took {save_time:.2f} seconds")
-            
-            # Calculate total service time
-            total_time = time.time() - start_time
-            # Include both original filename and UUID filename in the log
-            logger.info(f"[SERVICE] Successfully classified uploaded image '{file.filename}' (saved as {os.path.basename(image_path)}) in {total_time:.2f} seconds")
-            
-            # Add service timing information to result
-            if "processing_time" not in result:
-                result["processing_time"] = {}
-            
-            result["processing_time"].update({
-                "service_total_seconds": round(total_time, 2),
-                "image_processing_seconds": round(process_time, 2),
-                "save_results_seconds": round(save_time, 2)
-            })
+            result = self._classify_local_image(image_path)
             
+            self._finish_classification(result, image_path, kind, source, start_time, times)
+            self._cache_result(cache_key, result, persistent)
             return result
             
         except Exception as e:
-            error_message = f"Error classifying uploaded image: {str(e)}"
+            error_message = f"Error classifying {kind}: {str(e)}"
             logger.error(error_message)
             return {"error": error_message}
     
+    def classify_uploaded_image(self, file) -> Dict[str, Any]:
+        """
+        Classify an uploaded image.
+        
+        This method processes the uploaded image and classifies it using the OpenAI model.
+        The results are also saved to a JSON file in the data directory.
+        
+        Args:
+            file: Uploaded file object
+            
+        Returns:
+            Classification results
+        """
+        return self._classify(
+            "uploaded image", file.filename, self._file_content_key(file.file), True,
+            lambda: self.image_processor.process_uploaded_image(file)
+        )
+    
+    def classify_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Classify an uploaded image that has already been read into memory.
+        
+        This method processes the image bytes and classifies them using the OpenAI model.
+        The results are also saved to a JSON file in the data directory.
+        
+        Args:
+            data: Raw image bytes
+            filename: Original filename of the upload
+            
+        Returns:
+            Classification results
+        """
+        return self._classify(
+            "uploaded image", filename, self._content_key(data), True,
+            lambda: self.image_processor.process_image_bytes(data, filename)
+        )
+    
     def classify_image_url(self, url: str) -> Dict[str, Any]:
         """
         Classify an image from a URL.
@@ -98,52 +352,200 @@ class ClassificationService:
         Returns:
             Classification results
         """
-        start_time = time.time()
+        return self._classify(
+            "image URL", url, url.strip(), False,
+            lambda: self.image_processor.process_image_url(url)
+        )
+    
+    async def _single_flight(
+        self, key: Hashable, classify: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Run a classification, sharing it with concurrent callers for the same key.
+        
+        The first caller for a key runs the classification; callers that arrive
+        while it is in flight wait for its result instead of calling the API again.
+        
+        Args:
+            key: Cache key of the image
+            classify: Function that starts the classification
+            
+        Returns:
+            Classification results (a copy for callers that joined an in-flight classification)
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            logger.info("[SERVICE] Joining in-flight classification for the same image")
+            return dict(await asyncio.shield(future))
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
         try:
-            logger.info(f"Classifying image URL: {url}")
+            result = await classify()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody joined
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+    
+    async def _aclassify(
+        self, kind: str, source: str, cache_key: Hashable, persistent: bool,
+        process: Callable[[], Awaitable[Tuple[str, bool]]]
+    ) -> Dict[str, Any]:
+        """
+        Asynchronously classify an image (see _classify).
+        
+        Only the OpenAI API call holds the service's API limiter, so image
+        processing overlaps other images' API calls. Disk cache access runs in
+        a worker thread.
+        
+        Args:
+            kind: Kind of image source for messages ('uploaded image' or 'image URL')
+            source: Original filename or URL of the image
+            cache_key: Cache key of the image
+            persistent: Whether to also use the on-disk cache (content keys only)
+            process: Coroutine function that processes the image and returns
+                (image path, success flag)
             
-            # Process the image URL
-            process_start = time.time()
-            image_path, success = self.image_processor.process_image_url(url)
-            process_time = time.time() - process_start
-            logger.debug(f"Image URL processing took {process_time:.2f} seconds")
+        Returns:
+            Classification results
+        """
+        start_time = time.perf_counter()
+        times = new_timings()
+        try:
+            logger.info(f"Classifying {kind}: {source}")
+            
+            # Return the cached result if this image was classified before
+            if persistent:
+                cached_result = await to_thread.run_sync(self._get_cached_result, cache_key, True)
+            else:
+                cached_result = self._get_cached_result(cache_key)
+            if cached_result is not None:
+                logger.info(f"[SERVICE] Returning cached classification for {kind} '{source}'")
+                return cached_result
+            
+            # Process the image
+            with Timer(times, "image_processing_seconds"):
+                image_path, success = await process()
             
             if not success:
-                error_message = f"Failed to process the image URL: {url}"
+                error_message = f"Failed to process the {kind}: {source}"
                 logger.error(error_message)
                 return {"error": error_message}
             
             # Classify the image
-            classify_start = time.time()
-            result = self.model.classify_image(image_path)
-            classify_time = time.time() - classify_start
-            logger.debug(f"Image classification took {classify_time:.2f} seconds")
-            
-            # Save the results to a JSON file
-            save_start = time.time()
-            self._save_results_to_file(result, image_path)
-            save_time = time.time() - save_start
-            logger.debug(f"Saving results took {save_time:.2f} seconds")
-            
-            # Calculate total service time
-            total_time = time.time() - start_time
-            # Include both URL and UUID filename in the log
-            logger.info(f"[SERVICE] Successfully classified image URL '{url}' (saved as {os.path.basename(image_path)}) in {total_time:.2f} seconds")
-            
-            # Add service timing information to result
-            if "processing_time" not in result:
-                result["processing_time"] = {}
-            
-            result["processing_time"].update({
-                "service_total_seconds": round(total_time, 2),
-                "image_processing_seconds": round(process_time, 2),
-                "save_results_seconds": round(save_time, 2)
-            })
+            async with self._api_limiter:
+                result = await self._aclassify_local_image(image_path)
             
+            self._finish_classification(result, image_path, kind, source, start_time, times)
+            if persistent:
+                await to_thread.run_sync(self._cache_result, cache_key, result, True)
+            else:
+                self._cache_result(cache_key, result)
             return result
             
         except Exception as e:
-            error_message = f"Error classifying image URL: {str(e)}"
+            error_message = f"Error classifying {kind}: {str(e)}"
+            logger.error(error_message)
+            return {"error": error_message}
+    
+    async def aclassify_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify an uploaded image that has already been read into memory.
+        
+        Image processing runs in a worker thread, while the OpenAI API call is
+        awaited without occupying a thread. At most OPENAI_CONCURRENCY API calls
+        are in flight across the service. Results are saved in the background.
+        Concurrent calls with identical bytes share a single classification.
+        
+        Args:
+            data: Raw image bytes
+            filename: Original filename of the upload
+            
+        Returns:
+            Classification results
+        """
+        cache_key = self._content_key(data)
+        return await self._single_flight(
+            cache_key,
+            lambda: self._aclassify(
+                "uploaded image", filename, cache_key, True,
+                lambda: to_thread.run_sync(self.image_processor.process_image_bytes, data, filename)
+            )
+        )
+    
+    async def aclassify_image_url(self, url: str) -> Dict[str, Any]:
+        """
+        Asynchronously classify an image from a URL.
+        
+        The download and the OpenAI API call are awaited without occupying a
+        thread, while image processing runs in a worker thread. At most
+        OPENAI_CONCURRENCY API calls are in flight across the service. Results
+        are saved in the background. Concurrent calls for the same URL share a
+        single classification.
+        
+        Args:
+            url: URL of the image
+            
+        Returns:
+            Classification results
+        """
+        cache_key = url.strip()
+        return await self._single_flight(
+            cache_key,
+            lambda: self._aclassify(
+                "image URL", url, cache_key, False,
+                lambda: self.image_processor.aprocess_image_url(url)
+            )
+        )
+    
+    async def aclose(self) -> None:
+        """Close the connection pools and flush pending result saves."""
+        await self.image_processor.aclose()
+        await self.model.aclose()
+        await to_thread.run_sync(self._save_pool.shutdown)
+    
+    def submit_bulk(self, urls: List[str]) -> Dict[str, Any]:
+        """
+        Submit image URLs for offline classification through the OpenAI Batch API.
+        
+        Batch requests are billed at a lower rate than real-time requests and are
+        completed within 24 hours. Use get_bulk_results to collect the results.
+        
+        Args:
+            urls: List of image URLs
+            
+        Returns:
+            Batch information (batch ID, status, number of requests)
+        """
+        try:
+            logger.info(f"Submitting {len(urls)} image URL(s) for bulk classification")
+            return self.batch.submit_batch(urls)
+            
+        except Exception as e:
+            error_message = f"Error submitting bulk classification: {str(e)}"
+            logger.error(error_message)
+            return {"error": error_message}
+    
+    def get_bulk_results(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get the status and, once completed, the results of a bulk classification.
+        
+        Args:
+            batch_id: OpenAI batch ID returned by submit_bulk
+            
+        Returns:
+            Batch status, with classification results keyed by image URL once completed
+        """
+        try:
+            return self.batch.poll_batch(batch_id)
+            
+        except Exception as e:
+            error_message = f"Error getting bulk classification results: {str(e)}"
             logger.error(error_message)
             return {"error": error_message}
     
@@ -167,12 +569,11 @@ class ClassificationService:
             results_filename = f"{image_name}_results.json"
             results_path = os.path.join(settings.DATA_DIR, results_filename)
             
-            # Get the size of the result data
-            result_size = len(json.dumps(result))
-            
-            # Save the results to a JSON file
-            with open(results_path, 'w') as f:
-                json.dump(result, f, indent=2)
+            # Serialize the results once and save them to a JSON file
+            payload = orjson.dumps(result, option=orjson.OPT_INDENT_2)
+            result_size = len(payload)
+            with open(results_path, 'wb') as f:
+                f.write(payload)
             
             logger.info(f"Saved classification results to: {results_path} (size: {result_size} bytes)")
             return results_path, True
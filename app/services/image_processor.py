@@ -1,13 +1,28 @@
 import os
 import uuid
+import shutil
 import time
-from typing import Tuple
+from typing import Optional, Tuple
 
+import httpx
 import requests
+from anyio import to_thread
 from loguru import logger
 
 from app.core.config import settings
-from app.utils.image_utils import is_valid_image, normalize_image, get_image_info
+from app.core.logging import is_level_enabled
+from app.utils.image_utils import process_image, process_image_data
+
+# Block size for streaming downloaded images to disk (large blocks keep the
+# copy loop in C and reduce read/write syscalls for multi-MB images)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Block size for copying uploaded images to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of pooled connections for async image downloads (all of
+# them are kept alive between requests, so bursts reuse TCP/TLS connections)
+DOWNLOAD_MAX_CONNECTIONS = 32
 
 class ImageProcessor:
     """
@@ -22,42 +37,71 @@ class ImageProcessor:
         # Create data directory if it doesn't exist
         os.makedirs(settings.DATA_DIR, exist_ok=True)
         logger.info(f"Initialized ImageProcessor with data directory: {settings.DATA_DIR}")
+        
+        # Shared connection pool for async downloads (created on first use)
+        self._async_client = None
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared async HTTP client, creating it on first use.
+        
+        Returns:
+            Async HTTP client
+        """
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=10,
+                limits=httpx.Limits(
+                    max_connections=DOWNLOAD_MAX_CONNECTIONS,
+                    max_keepalive_connections=DOWNLOAD_MAX_CONNECTIONS
+                ),
+                follow_redirects=True
+            )
+        return self._async_client
+    
+    async def aclose(self) -> None:
+        """Close the shared async HTTP client."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
     
-    def _process_image(self, image_path: str, source_identifier: str, source_type: str) -> Tuple[bool, str]:
+    def _process_image(self, image_path: str, source_identifier: str, source_type: str,
+                       data: Optional[bytes] = None) -> Tuple[bool, str]:
         """
-        Process an image file after it has been saved to disk.
+        Process an image file after it has been saved to disk, or an image held in memory.
         
         This is a helper method that handles the common image processing steps:
-        validation, normalization, and logging.
+        validation, normalization, and logging. The image is opened only once.
         
         Args:
-            image_path: Path to the saved image file
+            image_path: Path to the saved image file (or to save the normalized image to if data is given)
             source_identifier: Identifier for the image source (filename or URL)
             source_type: Type of source ('uploaded' or 'url')
+            data: Image bytes, if the image has not been saved to disk
             
         Returns:
             Tuple of (success flag, error message)
         """
         try:
-            # Validate the image
-            if not is_valid_image(image_path):
-                error_msg = f"Invalid image format from {source_type}: {source_identifier}"
-                logger.error(error_msg)
-                return False, error_msg
-            
-            # Get image info before normalization
-            before_info = get_image_info(image_path)
-            logger.debug(f"Image info before normalization: {before_info}")
-            
-            # Normalize the image
-            if not normalize_image(image_path):
-                error_msg = f"Failed to normalize image from {source_type}: {source_identifier}"
+            # Validate, normalize and describe the image in a single pass
+            if data is None:
+                success, info = process_image(image_path)
+            else:
+                success, info = process_image_data(data, image_path)
+            if not success:
+                error_msg = f"Invalid image from {source_type}: {source_identifier}"
                 logger.error(error_msg)
                 return False, error_msg
             
-            # Get image info after normalization
-            after_info = get_image_info(image_path)
-            logger.debug(f"Image info after normalization: {after_info}")
+            if is_level_enabled("DEBUG"):
+                before_info = info["original"]
+                logger.debug(f"Image info before normalization: {before_info}")
+                logger.debug(f"Image info after normalization: {info}")
+                logger.debug(
+                    f"Normalized image from {source_type}: {source_identifier} "
+                    f"({before_info.get('width')}x{before_info.get('height')}, {before_info.get('size_bytes')} bytes -> "
+                    f"{info.get('width')}x{info.get('height')}, {info.get('size_bytes')} bytes)"
+                )
             
             return True, ""
             
@@ -78,15 +122,15 @@ class ImageProcessor:
         Returns:
             Tuple of (image path, success flag)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             # Generate a unique filename
             filename = f"{uuid.uuid4()}.jpg"
             image_path = os.path.join(settings.DATA_DIR, filename)
             
-            # Save the uploaded file
+            # Copy the uploaded file to disk in blocks, without reading it into memory whole
             with open(image_path, "wb") as buffer:
-                buffer.write(file.file.read())
+                shutil.copyfileobj(file.file, buffer, UPLOAD_CHUNK_SIZE)
             
             # Log with clear mapping between original filename and UUID filename
             logger.info(f"Saved uploaded image '{file.filename}' to: {image_path} (UUID-generated filename)")
@@ -97,7 +141,7 @@ class ImageProcessor:
                 os.remove(image_path)
                 return "", False
             
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             logger.info(f"[IMAGE_PROCESSOR] Successfully processed uploaded image '{file.filename}' (saved as {os.path.basename(image_path)}) in {process_time:.2f} seconds")
             return image_path, True
             
@@ -105,6 +149,44 @@ class ImageProcessor:
             logger.error(f"Error processing uploaded image: {str(e)}")
             return "", False
     
+    def process_image_bytes(self, data: bytes, source_identifier: str) -> Tuple[str, bool]:
+        """
+        Process an image that has already been read into memory.
+        
+        This method validates and normalizes the image bytes in memory and saves
+        the normalized image.
+        
+        Args:
+            data: Raw image bytes
+            source_identifier: Identifier for the image source (e.g. original filename)
+            
+        Returns:
+            Tuple of (image path, success flag)
+        """
+        start_time = time.perf_counter()
+        try:
+            # Generate a unique filename
+            filename = f"{uuid.uuid4()}.jpg"
+            image_path = os.path.join(settings.DATA_DIR, filename)
+            
+            # Process the image from memory (only the normalized image is written to disk)
+            success, error_msg = self._process_image(image_path, source_identifier, 'uploaded', data)
+            if not success:
+                if os.path.exists(image_path):
+                    os.remove(image_path)
+                return "", False
+            
+            # Log with clear mapping between original filename and UUID filename
+            logger.info(f"Saved uploaded image '{source_identifier}' to: {image_path} (UUID-generated filename)")
+            
+            process_time = time.perf_counter() - start_time
+            logger.info(f"[IMAGE_PROCESSOR] Successfully processed uploaded image '{source_identifier}' (saved as {os.path.basename(image_path)}) in {process_time:.2f} seconds")
+            return image_path, True
+            
+        except Exception as e:
+            logger.error(f"Error processing uploaded image: {str(e)}")
+            return "", False
+    
     def process_image_url(self, url: str) -> Tuple[str, bool]:
         """
         Process an image from a URL.
@@ -117,7 +199,7 @@ class ImageProcessor:
         Returns:
             Tuple of (image path, success flag)
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
             # Generate a unique filename
             filename = f"{uuid.uuid4()}.jpg"
@@ -128,14 +210,24 @@ class ImageProcessor:
             # Download the image
             response = requests.get(url, stream=True, timeout=10)
             if response.status_code != 200:
+                response.close()
                 error_msg = f"Failed to download image from URL: {url}, status code: {response.status_code}"
                 logger.error(error_msg)
                 return "", False
             
-            # Save the downloaded image
-            with open(image_path, "wb") as f:
-                for chunk in response.iter_content(1024):
-                    f.write(chunk)
+            # Stream the downloaded image to disk in large blocks
+            # (decode_content transparently handles gzip/deflate transfer encoding)
+            try:
+                with open(image_path, "wb") as f:
+                    if response.raw is not None:
+                        response.raw.decode_content = True
+                        shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+                    else:
+                        # No raw stream (e.g. an adapter that does not expose one)
+                        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+            finally:
+                response.close()
             
             # Log with clear mapping between URL and UUID filename
             logger.info(f"Saved image from URL '{url}' to: {image_path} (UUID-generated filename)")
@@ -146,10 +238,80 @@ class ImageProcessor:
                 os.remove(image_path)
                 return "", False
             
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             logger.info(f"[IMAGE_PROCESSOR] Successfully processed image from URL '{url}' (saved as {os.path.basename(image_path)}) in {process_time:.2f} seconds")
             return image_path, True
             
         except Exception as e:
             logger.error(f"Error processing image URL: {str(e)}")
-            return "", False
\ No newline at end of file
+            return "", False
+    
+    def _process_download(self, data: bytes, image_path: str, url: str) -> bool:
+        """
+        Process a downloaded image and save the normalized image to disk.
+        
+        Args:
+            data: Downloaded image bytes
+            image_path: Path to save the image to
+            url: URL the image was downloaded from
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        # Process the image from memory (only the normalized image is written to disk)
+        success, error_msg = self._process_image(image_path, url, 'url', data)
+        if not success:
+            if os.path.exists(image_path):
+                os.remove(image_path)
+            return False
+        
+        # Log with clear mapping between URL and UUID filename
+        logger.info(f"Saved image from URL '{url}' to: {image_path} (UUID-generated filename)")
+        return True
+    
+    async def aprocess_image_url(self, url: str) -> Tuple[str, bool]:
+        """
+        Asynchronously process an image from a URL.
+        
+        The image is downloaded on the event loop through a shared connection
+        pool, and then validated and normalized in memory in a worker thread.
+        
+        Args:
+            url: URL of the image
+            
+        Returns:
+            Tuple of (image path, success flag)
+        """
+        start_time = time.perf_counter()
+        try:
+            # Generate a unique filename
+            filename = f"{uuid.uuid4()}.jpg"
+            image_path = os.path.join(settings.DATA_DIR, filename)
+            
+            logger.info(f"Downloading image from URL: {url}")
+            
+            # Download the image, giving up as soon as it exceeds the maximum size
+            data = bytearray()
+            async with self._get_async_client().stream("GET", url) as response:
+                if response.status_code != 200:
+                    error_msg = f"Failed to download image from URL: {url}, status code: {response.status_code}"
+                    logger.error(error_msg)
+                    return "", False
+                
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    data += chunk
+                    if len(data) > settings.MAX_IMAGE_SIZE:
+                        logger.error(f"Image from URL too large: {url}")
+                        return "", False
+            
+            # Save and process the image
+            if not await to_thread.run_sync(self._process_download, bytes(data), image_path, url):
+                return "", False
+            
+            process_time = time.perf_counter() - start_time
+            logger.info(f"[IMAGE_PROCESSOR] Successfully processed image from URL '{url}' (saved as {os.path.basename(image_path)}) in {process_time:.2f} seconds")
+            return image_path, True
+            
+        except Exception as e:
+            logger.error(f"Error processing image URL: {str(e)}")
+            return "", False
@@ -3,6 +3,11 @@ from typing import Dict, Any
 from fastapi import HTTPException
 from loguru import logger
 
+from app.core.config import settings
+
+# Supported image content types (settings are frozen, so this can be bound once)
+SUPPORTED_IMAGE_TYPES = settings.SUPPORTED_MIME_TYPES
+
 def format_error_response(error_message: str, status_code: int = 500) -> Dict[str, Any]:
     """
     Format an error response.
@@ -88,11 +93,4 @@ def validate_image_format(content_type: str) -> bool:
     Returns:
         True if the format is supported, False otherwise
     """
-    supported_formats = [
-        "image/jpeg",
-        "image/jpg",
-        "image/png",
-        "image/webp"
-    ]
-    
-    return content_type in supported_formats
\ No newline at end of file
+    return content_type in SUPPORTED_IMAGE_TYPES
\ No newline at end of file
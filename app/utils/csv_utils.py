@@ -0,0 +1,30 @@
+import csv
+from io import StringIO
+from typing import Any, Iterable
+
+# Characters that require a CSV field to be quoted
+_CSV_SPECIAL_CHARS = frozenset(',"\r\n')
+
+def format_csv_row(fields: Iterable[Any]) -> str:
+    """
+    Format a single CSV row exactly as csv.writer would.
+    
+    Fields without special characters are joined directly; rows that need
+    quoting fall back to the csv module. None is written as an empty field.
+    
+    Args:
+        fields: Row fields
+        
+    Returns:
+        CSV row including the line terminator
+    """
+    fields = ["" if field is None else str(field) for field in fields]
+    
+    # csv.writer quotes a row made of a single empty field so it is not read
+    # back as an empty line
+    if fields != [""] and all(_CSV_SPECIAL_CHARS.isdisjoint(field) for field in fields):
+        return ",".join(fields) + "\r\n"
+    
+    output = StringIO()
+    csv.writer(output).writerow(fields)
+    return output.getvalue()
@@ -1,85 +1,266 @@
+import io
+import math
 import os
+import shutil
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple, Union
 
 from PIL import Image
 from loguru import logger
 
 from app.core.config import settings
 
-def is_valid_image(image_path: str) -> bool:
+try:
+    import numpy as np
+    from turbojpeg import TurboJPEG, TJFLAG_PROGRESSIVE, TJPF_RGB, TJSAMP_420
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # PyTurboJPEG or libjpeg-turbo not installed
+    _turbo_jpeg = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # opencv-python-headless not installed
+    cv2 = None
+
+# Maximum width/height of images sent to the vision model
+MAX_IMAGE_DIMENSION = 1024
+
+# Supported formats and maximum file size (settings are frozen, so these can be bound once)
+_SUPPORTED_FORMATS = frozenset(fmt.lower() for fmt in settings.SUPPORTED_FORMATS)
+_MAX_IMAGE_SIZE = settings.MAX_IMAGE_SIZE
+
+# Images with more pixels than this are rejected from their headers, before any
+# pixel data is decoded. Pillow also raises DecompressionBombError on open for
+# images with more than twice as many pixels.
+_MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+Image.MAX_IMAGE_PIXELS = _MAX_IMAGE_PIXELS
+
+# JPEG quality used when re-encoding normalized images
+JPEG_QUALITY = settings.JPEG_QUALITY
+
+# An image file path or an already opened image
+ImageSource = Union[str, Image.Image]
+
+@contextmanager
+def _open_image(image: ImageSource) -> Iterator[Image.Image]:
+    """
+    Open an image source, closing it afterwards only if it was opened here.
+    
+    Args:
+        image: Path to the image file or an already opened image
+        
+    Yields:
+        Opened image
+    """
+    if isinstance(image, Image.Image):
+        yield image
+    else:
+        with Image.open(image) as img:
+            yield img
+
+def _is_supported_image(img: Image.Image) -> bool:
+    """
+    Check if an opened image is in a supported format and not too large to decode.
+    
+    Only the image headers are used, so this is safe to call before decoding.
+    
+    Args:
+        img: Opened image
+        
+    Returns:
+        True if the image is supported, False otherwise
+    """
+    if img.format and img.format.lower() not in _SUPPORTED_FORMATS:
+        logger.warning(f"Unsupported image format: {img.format}")
+        return False
+    
+    width, height = img.size
+    if width * height > _MAX_IMAGE_PIXELS:
+        logger.warning(f"Image has too many pixels: {width}x{height}")
+        return False
+    
+    return True
+
+def _image_info(img: Image.Image, size_bytes: int) -> dict:
+    """
+    Build the information dictionary for an image.
+    
+    Args:
+        img: Image
+        size_bytes: Size of the image file in bytes
+        
+    Returns:
+        Dictionary with image information
+    """
+    return {
+        "width": img.width,
+        "height": img.height,
+        "format": img.format,
+        "mode": img.mode,
+        "size_bytes": size_bytes
+    }
+
+def _fit_size(width: int, height: int) -> Tuple[int, int]:
+    """
+    Compute the size of an image downscaled to fit within MAX_IMAGE_DIMENSION.
+    
+    Rounds the same way as Pillow's thumbnail (to whichever neighbouring
+    integer keeps the aspect ratio closest), so both resize paths produce
+    images of the same size.
+    
+    Args:
+        width: Image width
+        height: Image height
+        
+    Returns:
+        Downscaled (width, height)
+    """
+    aspect = width / height
+    if aspect >= 1:
+        x = MAX_IMAGE_DIMENSION
+        y = min(math.floor(x / aspect), math.ceil(x / aspect), key=lambda n: 0 if n == 0 else abs(aspect - x / n))
+    else:
+        y = MAX_IMAGE_DIMENSION
+        x = min(math.floor(y * aspect), math.ceil(y * aspect), key=lambda n: abs(aspect - n / y))
+    return max(x, 1), max(y, 1)
+
+def _downscale(img: Image.Image) -> Image.Image:
+    """
+    Downscale an RGB image to fit within MAX_IMAGE_DIMENSION, preserving the aspect ratio.
+    
+    Uses OpenCV's SIMD area-averaging resize if available, which is faster than
+    Lanczos and well suited to shrinking; otherwise falls back to Pillow's
+    Lanczos thumbnail.
+    
+    Args:
+        img: RGB image
+        
+    Returns:
+        Downscaled image (the same image if it already fits)
+    """
+    width, height = img.size
+    if max(width, height) <= MAX_IMAGE_DIMENSION:
+        return img
+    
+    if cv2 is None:
+        img.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.Resampling.LANCZOS)
+        return img
+    
+    resized = cv2.resize(np.asarray(img), _fit_size(width, height), interpolation=cv2.INTER_AREA)
+    return Image.fromarray(resized)
+
+def _save_normalized(img: Image.Image, output_path: str, data: Optional[bytes] = None) -> Image.Image:
+    """
+    Convert an opened image to RGB, downscale it and save it as JPEG.
+    
+    An RGB JPEG that already fits within MAX_IMAGE_DIMENSION is decoded to
+    check it but otherwise left as is (only written or copied if output_path
+    is not its own file), since re-encoding it would cost CPU and lose quality
+    without shrinking it.
+    
+    Args:
+        img: Opened image (its pixels must not have been loaded yet for draft decoding to apply)
+        output_path: Path to save the normalized image to
+        data: Contents of the image file if the image was opened from memory
+        
+    Returns:
+        Normalized image
+    """
+    # Skip re-encoding if the image is already a small RGB JPEG (decoding it
+    # first, so corrupt or truncated files are still rejected)
+    if img.format == "JPEG" and img.mode == "RGB" and max(img.size) <= MAX_IMAGE_DIMENSION:
+        img.load()
+        if data is not None:
+            with open(output_path, "wb") as f:
+                f.write(data)
+        elif os.path.abspath(output_path) != os.path.abspath(img.filename):
+            shutil.copyfile(img.filename, output_path)
+        return img
+    
+    # Let libjpeg decode large JPEGs directly at a reduced scale (1/2, 1/4
+    # or 1/8) that is still at least the maximum dimension
+    if img.format == "JPEG":
+        img.draft("RGB", (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+    
+    # Convert to RGB if needed
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    
+    # Downscale to fit within the maximum dimension (preserving aspect ratio)
+    img = _downscale(img)
+    
+    # Save the normalized image as a progressive 4:2:0 JPEG (with libjpeg-turbo's
+    # SIMD encoder if available). Progressive encoding with optimized Huffman
+    # tables makes the file a few percent smaller than baseline, which reduces
+    # the bytes base64-encoded and uploaded to the model.
+    if _turbo_jpeg is not None:
+        encoded = _turbo_jpeg.encode(
+            np.asarray(img), quality=JPEG_QUALITY, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420,
+            flags=TJFLAG_PROGRESSIVE
+        )
+        with open(output_path, "wb") as f:
+            f.write(encoded)
+    else:
+        img.save(output_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True, subsampling=2)
+    
+    return img
+
+def is_valid_image(image: ImageSource) -> bool:
     """
     Check if an image is valid.
     
-    This function validates an image file by checking its format and size.
+    This function validates an image file by checking its size, format and
+    dimensions.
     
     Args:
-        image_path: Path to the image file
+        image: Path to the image file or an image opened from a file
         
     Returns:
         True if the image is valid, False otherwise
     """
     try:
-        # Try to open the image
-        with Image.open(image_path) as img:
-            # Check if the format is supported
-            if img.format and img.format.lower() not in settings.SUPPORTED_FORMATS:
-                logger.warning(f"Unsupported image format: {img.format}")
-                return False
-            
-            # Check if the image is too large
-            if os.path.getsize(image_path) > settings.MAX_IMAGE_SIZE:
-                logger.warning(f"Image too large: {os.path.getsize(image_path)} bytes")
-                return False
-            
-            return True
+        # Check if the image is too large (before opening it, so oversized files are never parsed)
+        size_bytes = os.path.getsize(image.filename if isinstance(image, Image.Image) else image)
+        if size_bytes > _MAX_IMAGE_SIZE:
+            logger.warning(f"Image too large: {size_bytes} bytes")
+            return False
+        
+        # Check if the format and dimensions are supported
+        with _open_image(image) as img:
+            return _is_supported_image(img)
             
     except Exception as e:
         logger.error(f"Error validating image: {str(e)}")
         return False
 
-def normalize_image(image_path: str) -> bool:
+def normalize_image(image: ImageSource, output_path: Optional[str] = None) -> bool:
     """
     Normalize an image (resize, convert to RGB, etc.).
     
-    This function normalizes an image by converting it to RGB format if needed
-    and resizing it if it's too large, while preserving the aspect ratio.
+    This function normalizes an image by converting it to RGB format if needed,
+    downscaling it if either side exceeds MAX_IMAGE_DIMENSION (preserving the
+    aspect ratio), and re-encoding it as JPEG. This keeps the payload and
+    vision-token count sent to the model small.
     
     Args:
-        image_path: Path to the image file
+        image: Path to the image file or an image opened from a file
+        output_path: Path to save the normalized image to (defaults to the image's own file)
         
     Returns:
         True if successful, False otherwise
     """
     try:
         # Open the image
-        with Image.open(image_path) as img:
-            # Convert to RGB if needed
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            
-            # Resize if too large (preserving aspect ratio)
-            max_size = 1024
-            if img.width > max_size or img.height > max_size:
-                # Calculate new dimensions
-                if img.width > img.height:
-                    new_width = max_size
-                    new_height = int(img.height * (max_size / img.width))
-                else:
-                    new_height = max_size
-                    new_width = int(img.width * (max_size / img.height))
-                
-                # Resize the image
-                img = img.resize((new_width, new_height), Image.LANCZOS)
-            
-            # Save the normalized image
-            img.save(image_path, "JPEG", quality=85)
-            
+        with _open_image(image) as img:
+            _save_normalized(img, output_path or img.filename)
             return True
             
     except Exception as e:
         logger.error(f"Error normalizing image: {str(e)}")
         return False
 
-def get_image_info(image_path: str) -> dict:
+def get_image_info(image: ImageSource) -> dict:
     """
     Get information about an image.
     
@@ -87,20 +268,94 @@ def get_image_info(image_path: str) -> dict:
     format, and mode.
     
     Args:
-        image_path: Path to the image file
+        image: Path to the image file or an image opened from a file
         
     Returns:
         Dictionary with image information
     """
     try:
-        with Image.open(image_path) as img:
-            return {
-                "width": img.width,
-                "height": img.height,
-                "format": img.format,
-                "mode": img.mode,
-                "size_bytes": os.path.getsize(image_path)
-            }
+        with _open_image(image) as img:
+            return _image_info(img, os.path.getsize(img.filename))
     except Exception as e:
         logger.error(f"Error getting image info: {str(e)}")
-        return {}
\ No newline at end of file
+        return {}
+
+def _validate_and_normalize(source: Union[str, io.BytesIO], size_bytes: int, output_path: str,
+                            data: Optional[bytes] = None) -> Tuple[bool, dict]:
+    """
+    Validate and normalize an image with a single Image.open (see process_image).
+    
+    Args:
+        source: Path to the image file or a buffer with its contents
+        size_bytes: Size of the image file in bytes
+        output_path: Path to save the normalized image to
+        data: Contents of the image file if source is a buffer
+        
+    Returns:
+        Tuple of (success flag, image information)
+    """
+    # Check if the image is too large (before opening it)
+    if size_bytes > _MAX_IMAGE_SIZE:
+        logger.warning(f"Image too large: {size_bytes} bytes")
+        return False, {}
+    
+    with Image.open(source) as img:
+        # Check if the format and dimensions are supported (before decoding)
+        if not _is_supported_image(img):
+            return False, {}
+        
+        # Normalize the image
+        original_info = _image_info(img, size_bytes)
+        normalized = _save_normalized(img, output_path, data)
+    
+    info = _image_info(normalized, os.path.getsize(output_path))
+    info["format"] = "JPEG"
+    info["original"] = original_info
+    return True, info
+
+def process_image(image_path: str) -> Tuple[bool, dict]:
+    """
+    Validate and normalize an image file in place in a single pass.
+    
+    This function does the work of is_valid_image, normalize_image and
+    get_image_info with one stat and one Image.open: the file size is
+    checked first, the format is read from the headers, and the image is
+    normalized and saved over the original file. The returned information
+    is built from the images in memory instead of reopening the file.
+    
+    Args:
+        image_path: Path to the image file
+        
+    Returns:
+        Tuple of (success flag, information about the normalized image, with
+        the information about the original image under "original")
+    """
+    try:
+        return _validate_and_normalize(image_path, os.path.getsize(image_path), image_path)
+        
+    except Exception as e:
+        logger.error(f"Error processing image: {str(e)}")
+        return False, {}
+
+def process_image_data(data: bytes, output_path: str) -> Tuple[bool, dict]:
+    """
+    Validate and normalize an image held in memory, writing only the result to disk.
+    
+    This is process_image for images that were uploaded or downloaded into
+    memory: the image is decoded from the bytes directly, so the original
+    file is never written to disk and read back.
+    
+    Args:
+        data: Contents of the image file
+        output_path: Path to save the normalized image to
+        
+    Returns:
+        Tuple of (success flag, information about the normalized image, with
+        the information about the original image under "original")
+    """
+    try:
+        return _validate_and_normalize(io.BytesIO(data), len(data), output_path, data)
+        
+    except Exception as e:
+        logger.error(f"Error processing image: {str(e)}")
+        return False, {}
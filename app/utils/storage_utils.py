@@ -0,0 +1,56 @@
+import os
+from functools import lru_cache
+from typing import Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    import boto3
+except ImportError:  # boto3 is only needed when S3_BUCKET is set
+    boto3 = None
+
+@lru_cache(maxsize=1)
+def _get_s3_client():
+    """Get the shared S3 client (boto3 clients are thread-safe)."""
+    return boto3.client("s3")
+
+def is_object_storage_enabled() -> bool:
+    """
+    Check if images can be served to the model from object storage.
+
+    Returns:
+        True if an S3 bucket is configured and boto3 is installed, False otherwise
+    """
+    return bool(settings.S3_BUCKET) and boto3 is not None
+
+def get_presigned_image_url(image_path: str) -> Optional[str]:
+    """
+    Upload an image to object storage and get a short-lived presigned URL for it.
+
+    Passing this URL to the vision model avoids base64-encoding the image and
+    embedding it in the request body.
+
+    Args:
+        image_path: Path to the image file
+
+    Returns:
+        Presigned URL, or None if object storage is not enabled or the upload failed
+    """
+    if not is_object_storage_enabled():
+        return None
+
+    try:
+        key = f"{settings.S3_PREFIX}{os.path.basename(image_path)}"
+        client = _get_s3_client()
+        client.upload_file(image_path, settings.S3_BUCKET, key, ExtraArgs={"ContentType": "image/jpeg"})
+        return client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": settings.S3_BUCKET, "Key": key},
+            ExpiresIn=settings.S3_PRESIGN_EXPIRY
+        )
+
+    except Exception as e:
+        logger.warning(f"Failed to upload image to object storage, falling back to base64: {str(e)}")
+        return None
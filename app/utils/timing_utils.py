@@ -0,0 +1,57 @@
+from time import perf_counter
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+def new_timings() -> Optional[Dict[str, float]]:
+    """
+    Create a dictionary for recording step timings.
+
+    Returns:
+        Empty dictionary, or None if EMIT_TIMINGS is disabled (timers then record nothing)
+    """
+    return {} if settings.EMIT_TIMINGS else None
+
+def rounded_timings(times: Dict[str, float]) -> Dict[str, float]:
+    """
+    Round recorded step timings for inclusion in a result.
+
+    Args:
+        times: Step timings in seconds
+
+    Returns:
+        Step timings rounded to two decimals
+    """
+    return {key: round(seconds, 2) for key, seconds in times.items()}
+
+class Timer:
+    """
+    Context manager that records the duration of a block.
+
+    The duration is measured with time.perf_counter and stored in the given
+    timings dictionary under the given key. If the dictionary is None, the
+    block is not timed at all.
+    """
+
+    __slots__ = ("times", "key", "start")
+
+    def __init__(self, times: Optional[Dict[str, float]], key: str):
+        """
+        Initialize the timer.
+
+        Args:
+            times: Dictionary to record the duration in, or None to disable timing
+            key: Key to record the duration under
+        """
+        self.times = times
+        self.key = key
+        self.start = 0.0
+
+    def __enter__(self) -> "Timer":
+        if self.times is not None:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.times is not None:
+            self.times[self.key] = perf_counter() - self.start
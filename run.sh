@@ -33,6 +33,9 @@ fi
 
 echo "Ports are clear. Starting services..."
 
+# Number of API worker processes (defaults to 2 * CPU count + 1)
+API_WORKERS=${WEB_CONCURRENCY:-$(( $(nproc) * 2 + 1 ))}
+
 # Check if a tmux session named "brandsafety" already exists
 if tmux has-session -t brandsafety 2>/dev/null; then
     echo "A tmux session named 'brandsafety' already exists."
@@ -47,7 +50,7 @@ tmux new-session -d -s brandsafety
 tmux split-window -h -t brandsafety
 
 # Configure the left pane (backend)
-tmux send-keys -t brandsafety:0.0 "cd $(pwd) && source venv/bin/activate && echo 'Starting FastAPI server...' && python -m uvicorn app.api.main:app --host 0.0.0.0 --port 8000" C-m
+tmux send-keys -t brandsafety:0.0 "cd $(pwd) && source venv/bin/activate && echo 'Starting FastAPI server...' && API_WORKERS=$API_WORKERS python -m uvicorn app.api.main:app --host 0.0.0.0 --port 8000 --loop uvloop --http httptools --workers $API_WORKERS --no-access-log" C-m
 
 # Wait a moment for the API to start
 sleep 2
@@ -1,7 +1,9 @@
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import MagicMock, AsyncMock
 
+from app.api.dependencies import get_classification_service
 from app.api.main import app
+from app.core.config import settings
 
 client = TestClient(app)
 
@@ -15,6 +17,10 @@ class TestEndpoints:
     
     def setup_method(self):
         """Set up the test environment."""
+        # Replace the shared classification service with a mock
+        self.mock_service = MagicMock()
+        app.dependency_overrides[get_classification_service] = lambda: self.mock_service
+        
         # Create a mock classification result
         self.mock_result = {
             "image_path": "79d754a275386650e7e71d67f3cde5f2.png",
@@ -44,6 +50,10 @@ class TestEndpoints:
             "obscenityAndProfanityRating_explanation": "No obscenity or profanity detected in the image."
         }
     
+    def teardown_method(self):
+        """Clean up the test environment."""
+        app.dependency_overrides.clear()
+    
     def test_health_check(self):
         """Test that the health check endpoint returns a 200 status code."""
         response = client.get("/api/v1/health")
@@ -52,11 +62,10 @@ class TestEndpoints:
         assert "status" in response.json()["data"]
         assert response.json()["data"]["status"] == "ok"
     
-    @patch('app.api.endpoints.classification.classification_service')
-    def test_classify_image_success(self, mock_service):
+    def test_classify_image_success(self):
         """Test that the classify image endpoint correctly handles a successful request."""
         # Set up the mock
-        mock_service.classify_uploaded_image.return_value = self.mock_result
+        self.mock_service.aclassify_bytes = AsyncMock(return_value=self.mock_result)
         
         # Create a test file
         files = {"file": ("79d754a275386650e7e71d67f3cde5f2.png", b"image_data", "image/png")}
@@ -70,11 +79,10 @@ class TestEndpoints:
         assert response.json()["data"]["adultContentRating"] == "high"
         assert response.json()["data"]["drugsContentRating"] == "medium"
     
-    @patch('app.api.endpoints.classification.classification_service')
-    def test_classify_image_error(self, mock_service):
+    def test_classify_image_error(self):
         """Test that the classify image endpoint correctly handles an error."""
         # Set up the mock
-        mock_service.classify_uploaded_image.return_value = {"error": "Test error"}
+        self.mock_service.aclassify_bytes = AsyncMock(return_value={"error": "Test error"})
         
         # Create a test file
         files = {"file": ("79d754a275386650e7e71d67f3cde5f2.png", b"image_data", "image/png")}
@@ -87,8 +95,7 @@ class TestEndpoints:
         assert response.json()["success"] is False
         assert response.json()["error"]["message"] == "Test error"
     
-    @patch('app.api.endpoints.classification.classification_service')
-    def test_classify_image_invalid_format(self, mock_service):
+    def test_classify_image_invalid_format(self):
         """Test that the classify image endpoint correctly handles an invalid file format."""
         # Create a test file with an invalid format
         files = {"file": ("test_file.txt", b"text_data", "text/plain")}
@@ -101,11 +108,27 @@ class TestEndpoints:
         assert response.json()["success"] is False
         assert "Unsupported file format" in response.json()["error"]["message"]
     
-    @patch('app.api.endpoints.classification.classification_service')
-    def test_classify_image_url_success(self, mock_service):
+    def test_classify_image_too_large(self):
+        """Test that the classify image endpoint rejects an oversized upload before classifying it."""
+        # Set up the mock
+        self.mock_service.aclassify_bytes = AsyncMock(return_value=self.mock_result)
+        
+        # Create a test file one byte over the size limit
+        files = {"file": ("79d754a275386650e7e71d67f3cde5f2.png", b"\0" * (settings.MAX_IMAGE_SIZE + 1), "image/png")}
+        
+        # Make the request
+        response = client.post("/api/v1/classify", files=files)
+        
+        # Check the response
+        assert response.status_code == 413
+        assert response.json()["success"] is False
+        assert "Image too large" in response.json()["error"]["message"]
+        self.mock_service.aclassify_bytes.assert_not_called()
+    
+    def test_classify_image_url_success(self):
         """Test that the classify image URL endpoint correctly handles a successful request."""
         # Set up the mock
-        mock_service.classify_image_url.return_value = self.mock_result
+        self.mock_service.aclassify_image_url = AsyncMock(return_value=self.mock_result)
         
         # Make the request
         response = client.post(
@@ -119,11 +142,10 @@ class TestEndpoints:
         assert response.json()["data"]["adultContentRating"] == "high"
         assert response.json()["data"]["drugsContentRating"] == "medium"
     
-    @patch('app.api.endpoints.classification.classification_service')
-    def test_classify_image_url_error(self, mock_service):
+    def test_classify_image_url_error(self):
         """Test that the classify image URL endpoint correctly handles an error."""
         # Set up the mock
-        mock_service.classify_image_url.return_value = {"error": "Test error"}
+        self.mock_service.aclassify_image_url = AsyncMock(return_value={"error": "Test error"})
         
         # Make the request
         response = client.post(
@@ -145,4 +167,20 @@ class TestEndpoints:
         )
         
         # Check the response
-        assert response.status_code == 422  # Validation error
\ No newline at end of file
+        assert response.status_code == 422  # Validation error
+    
+    def test_classify_bulk_success(self):
+        """Test that the classify bulk endpoint submits the URLs as a batch."""
+        # Set up the mock
+        self.mock_service.submit_bulk.return_value = {"batch_id": "batch_abc123", "status": "validating", "request_count": 1}
+        
+        # Make the request
+        response = client.post(
+            "/api/v1/classify-bulk",
+            json={"urls": ["https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png"]}
+        )
+        
+        # Check the response
+        assert response.status_code == 200
+        assert response.json()["success"] is True
+        assert response.json()["data"]["batch_id"] == "batch_abc123"
@@ -0,0 +1,106 @@
+from unittest.mock import patch, MagicMock
+
+import orjson
+
+from app.models.openai_batch import OpenAIBatch
+from app.models.openai_model import OpenAIModel
+
+class TestOpenAIBatch:
+    """
+    Tests for the OpenAIBatch class.
+    
+    These tests verify that batches are submitted with one request per image
+    and that their output and error files are mapped back to the images.
+    """
+    
+    def setup_method(self):
+        """Set up the test environment."""
+        self.url_1 = "https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png"
+        self.url_2 = "https://brandsafety-crawler.s3.amazonaws.com/screenshots/0b3e3bd2c5cbb1d1f3d8e6b1a2c4d5e6.png"
+        
+        # Create a mock chat completion body
+        self.completion_body = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": '{"adultContentRating": "low"}'}
+            }]
+        }
+    
+    @patch('app.models.openai_model.AsyncOpenAI')
+    @patch('app.models.openai_model.OpenAI')
+    def _create_batch(self, tmp_path, mock_openai, mock_async_openai) -> OpenAIBatch:
+        """Create a batch client with a mock OpenAI client and a temporary batches directory."""
+        batch = OpenAIBatch(OpenAIModel())
+        batch.client = MagicMock()
+        batch.batches_dir = str(tmp_path)
+        return batch
+    
+    def test_submit_batch(self, tmp_path):
+        """Test that a batch is submitted with one chat completion request per image."""
+        batch = self._create_batch(tmp_path)
+        requests = []
+        
+        def upload(file, purpose):
+            requests.extend(orjson.loads(line) for line in file.read().splitlines())
+            return MagicMock(id="file-1")
+        
+        batch.client.files.create.side_effect = upload
+        batch.client.batches.create.return_value = MagicMock(id="batch_1", status="validating")
+        
+        # Submit two image URLs
+        info = batch.submit_batch([self.url_1, self.url_2])
+        
+        # Check the submitted requests and the stored request ID mapping
+        assert info == {"batch_id": "batch_1", "status": "validating", "request_count": 2}
+        assert [request["body"]["messages"][1]["content"][1]["image_url"]["url"] for request in requests] == [self.url_1, self.url_2]
+        assert all(request["body"]["response_format"] == {"type": "json_object"} for request in requests)
+        with open(tmp_path / "batch_1.json", "rb") as f:
+            custom_ids = orjson.loads(f.read())
+        assert sorted(custom_ids.values()) == sorted([self.url_1, self.url_2])
+        batch.client.batches.create.assert_called_once_with(
+            input_file_id="file-1", endpoint="/v1/chat/completions", completion_window="24h"
+        )
+    
+    def test_poll_batch_in_progress(self, tmp_path):
+        """Test that no results are returned before the batch has completed."""
+        batch = self._create_batch(tmp_path)
+        batch.client.batches.retrieve.return_value = MagicMock(id="batch_1", status="in_progress", request_counts=None)
+        
+        # Poll the batch
+        status = batch.poll_batch("batch_1")
+        
+        # Check that only the status was returned
+        assert status == {"batch_id": "batch_1", "status": "in_progress"}
+        batch.client.files.content.assert_not_called()
+    
+    def test_poll_batch_reports_failed_requests(self, tmp_path):
+        """Test that requests listed in the error file are reported as failures."""
+        batch = self._create_batch(tmp_path)
+        with open(tmp_path / "batch_1.json", "wb") as f:
+            f.write(orjson.dumps({"req_1": self.url_1, "req_2": self.url_2}))
+        batch.client.batches.retrieve.return_value = MagicMock(
+            id="batch_1", status="completed", request_counts=None,
+            output_file_id="file-output", error_file_id="file-error"
+        )
+        files = {
+            "file-output": orjson.dumps({
+                "custom_id": "req_1", "response": {"status_code": 200, "body": self.completion_body}, "error": None
+            }).decode(),
+            "file-error": orjson.dumps({
+                "custom_id": "req_2", "response": None, "error": {"code": "invalid_image", "message": "Invalid image"}
+            }).decode(),
+        }
+        batch.client.files.content.side_effect = lambda file_id: MagicMock(text=files[file_id])
+        
+        # Poll the batch
+        status = batch.poll_batch("batch_1")
+        
+        # Check that both the successful and the failed request are reported
+        assert status["results"][self.url_1]["adultContentRating"] == "low"
+        assert status["results"][self.url_1]["image_path"] == self.url_1
+        assert "invalid_image" in status["results"][self.url_2]["error"]
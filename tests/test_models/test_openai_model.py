@@ -1,4 +1,9 @@
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import httpx
+from openai import APIConnectionError
+from tenacity import wait_none
 
 from app.models.openai_model import OpenAIModel
 
@@ -109,6 +114,7 @@ class TestOpenAIModel:
         
         # Check that the client was called with the correct parameters
         self.mock_client.chat.completions.create.assert_called_once()
+        assert self.mock_client.chat.completions.create.call_args.kwargs['response_format'] == {"type": "json_object"}
         
         # Check that the result contains the expected keys
         assert 'adultContentRating' in result
@@ -117,6 +123,69 @@ class TestOpenAIModel:
         assert 'image_path' in result
         assert result['image_path'] == 'https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png'
     
+    @patch('app.models.openai_model.AsyncOpenAI')
+    @patch('app.models.openai_model.OpenAI')
+    def test_aclassify_image_url(self, mock_openai, mock_async_openai):
+        """Test that the model correctly classifies an image URL asynchronously."""
+        # Set up the mocks
+        mock_openai.return_value = self.mock_client
+        mock_aclient = MagicMock()
+        mock_aclient.chat.completions.create = AsyncMock(return_value=self.mock_response)
+        mock_async_openai.return_value = mock_aclient
+        
+        # Create the model
+        model = OpenAIModel()
+        
+        # Classify an image URL
+        result = asyncio.run(model.aclassify_image_url('https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png'))
+        
+        # Check that the async client was used and the result contains the expected keys
+        mock_aclient.chat.completions.create.assert_awaited_once()
+        self.mock_client.chat.completions.create.assert_not_called()
+        assert 'adultContentRating' in result
+        assert result['image_path'] == 'https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png'
+    
+    @patch.object(OpenAIModel._acall_api.retry, 'wait', wait_none())
+    @patch('app.models.openai_model.AsyncOpenAI')
+    @patch('app.models.openai_model.OpenAI')
+    def test_aclassify_image_url_retries(self, mock_openai, mock_async_openai):
+        """Test that transient API errors are retried."""
+        # Set up the mocks: fail once with a connection error, then succeed
+        mock_openai.return_value = self.mock_client
+        mock_aclient = MagicMock()
+        connection_error = APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+        mock_aclient.chat.completions.create = AsyncMock(side_effect=[connection_error, self.mock_response])
+        mock_async_openai.return_value = mock_aclient
+        
+        # Create the model
+        model = OpenAIModel()
+        
+        # Classify an image URL
+        result = asyncio.run(model.aclassify_image_url('https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png'))
+        
+        # Check that the call was retried
+        assert mock_aclient.chat.completions.create.await_count == 2
+        assert 'adultContentRating' in result
+    
+    @patch.object(OpenAIModel._call_api.retry, 'wait', wait_none())
+    @patch('app.models.openai_model.OpenAI')
+    def test_classify_image_url_retries(self, mock_openai):
+        """Test that transient API errors are retried by the sync client."""
+        # Set up the mock: fail once with a connection error, then succeed
+        mock_openai.return_value = self.mock_client
+        connection_error = APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+        self.mock_client.chat.completions.create.side_effect = [connection_error, self.mock_response]
+        
+        # Create the model
+        model = OpenAIModel()
+        
+        # Classify an image URL
+        result = model.classify_image_url('https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png')
+        
+        # Check that the call was retried
+        assert self.mock_client.chat.completions.create.call_count == 2
+        assert 'adultContentRating' in result
+    
     @patch('app.models.openai_model.OpenAI')
     def test_process_response_json_error(self, mock_openai):
         """Test that the model handles JSON parsing errors correctly."""
@@ -143,4 +212,22 @@ class TestOpenAIModel:
         assert 'error' in result
         assert result['error'] == 'Failed to parse model response'
         assert 'raw_response' in result
-        assert result['raw_response'] == 'This is not valid JSON'
\ No newline at end of file
+        assert result['raw_response'] == 'This is not valid JSON'
+    
+    @patch('app.models.openai_model.AsyncOpenAI')
+    @patch('app.models.openai_model.OpenAI')
+    def test_aclose(self, mock_openai, mock_async_openai):
+        """Test that both OpenAI clients are closed."""
+        # Set up the mocks
+        mock_openai.return_value = self.mock_client
+        mock_aclient = MagicMock()
+        mock_aclient.close = AsyncMock()
+        mock_async_openai.return_value = mock_aclient
+        
+        # Create the model and close it
+        model = OpenAIModel()
+        asyncio.run(model.aclose())
+        
+        # Check that the connection pools of both clients were closed
+        self.mock_client.close.assert_called_once()
+        mock_aclient.close.assert_awaited_once()
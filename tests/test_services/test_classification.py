@@ -0,0 +1,262 @@
+import asyncio
+import os
+import time
+from unittest.mock import patch, AsyncMock
+
+from app.core.config import settings
+from app.services.classification import ClassificationService, _disk_cache_namespace
+
+class TestClassificationService:
+    """
+    Tests for the ClassificationService class.
+
+    These tests verify that the classification service processes and classifies
+    images and caches the results.
+    """
+
+    def setup_method(self):
+        """Set up the test environment."""
+        # Create a mock classification result
+        self.mock_result = {
+            "image_path": "data/79d754a275386650e7e71d67f3cde5f2.jpg",
+            "adultContentRating": "high",
+            "drugsContentRating": "medium",
+        }
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_classify_bytes_cached(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that identical image bytes are only classified once."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.classify_image.return_value = dict(self.mock_result)
+
+        # Create the service
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+
+        # Classify the same bytes twice
+        with patch.object(service, '_save_results_to_file'):
+            first = service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+            second = service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Check that the model was only called once and the results match
+        mock_model_cls.return_value.classify_image.assert_called_once()
+        assert second["adultContentRating"] == first["adultContentRating"]
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_classify_bytes_error_not_cached(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that failed classifications are not cached."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("", False)
+
+        # Create the service
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+
+        # Classify the same invalid bytes twice
+        service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+        result = service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Check that the image was processed both times
+        assert "error" in result
+        assert mock_processor_cls.return_value.process_image_bytes.call_count == 2
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_classify_image_url_cached(self, mock_model_cls, mock_processor_cls):
+        """Test that the same image URL is only classified once."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_url.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.classify_image.return_value = dict(self.mock_result)
+        url = "https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png"
+
+        # Create the service
+        service = ClassificationService()
+
+        # Classify the same URL twice
+        with patch.object(service, '_save_results_to_file'):
+            service.classify_image_url(url)
+            service.classify_image_url(url)
+
+        # Check that the image was only downloaded and classified once
+        mock_processor_cls.return_value.process_image_url.assert_called_once()
+        mock_model_cls.return_value.classify_image.assert_called_once()
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_aclassify_bytes_concurrent(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that concurrent uploads are classified with the async model."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.aclassify_image = AsyncMock(side_effect=lambda path: dict(self.mock_result))
+
+        # Create the service
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+
+        # Classify two different images at the same time
+        async def run():
+            return await asyncio.gather(
+                service.aclassify_bytes(b"image_1", "image_1.png"), service.aclassify_bytes(b"image_2", "image_2.png")
+            )
+
+        with patch.object(service, '_save_results_to_file'):
+            results = asyncio.run(run())
+
+        # Check that both images were classified in order
+        assert len(results) == 2
+        assert all(result["adultContentRating"] == "high" for result in results)
+        assert mock_model_cls.return_value.aclassify_image.await_count == 2
+
+    @patch('app.services.classification.get_presigned_image_url')
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_classify_bytes_presigned_url(self, mock_model_cls, mock_processor_cls, mock_presign, tmp_path):
+        """Test that images are classified by presigned URL when object storage is enabled."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.classify_image_url.return_value = dict(self.mock_result, image_path="https://bucket.s3.amazonaws.com/signed")
+        mock_presign.return_value = "https://bucket.s3.amazonaws.com/signed"
+
+        # Create the service
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+
+        # Classify the image
+        with patch.object(service, '_save_results_to_file'):
+            result = service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Check that the presigned URL was classified instead of the base64 image
+        mock_model_cls.return_value.classify_image_url.assert_called_once_with("https://bucket.s3.amazonaws.com/signed")
+        mock_model_cls.return_value.classify_image.assert_not_called()
+        assert result["image_path"] == "data/79d754a275386650e7e71d67f3cde5f2.jpg"
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_classify_bytes_disk_cached(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that cached results are reused from disk by a new service instance."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.classify_image.return_value = dict(self.mock_result)
+
+        # Classify the image with one service instance
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+        with patch.object(service, '_save_results_to_file'):
+            service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Classify the same bytes with a fresh service instance (empty memory cache)
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+        result = service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Check that the model was only called once and the result came from disk
+        mock_model_cls.return_value.classify_image.assert_called_once()
+        assert result["adultContentRating"] == "high"
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_classify_bytes_disk_cache_expired(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that results older than RESULT_CACHE_TTL are not reused from disk."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.classify_image.return_value = dict(self.mock_result)
+
+        # Classify the image with one service instance
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+        with patch.object(service, '_save_results_to_file'):
+            service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Check that only the result file was left in the cache directory and age it past the TTL
+        cache_files = os.listdir(tmp_path)
+        assert len(cache_files) == 1 and cache_files[0].endswith(".json")
+        cache_path = os.path.join(tmp_path, cache_files[0])
+        expired_time = time.time() - settings.RESULT_CACHE_TTL - 1
+        os.utime(cache_path, (expired_time, expired_time))
+
+        # Classify the same bytes with a fresh service instance (empty memory cache)
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+        with patch.object(service, '_save_results_to_file'):
+            service.classify_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+
+        # Check that the expired result was ignored and replaced by a fresh one
+        assert mock_model_cls.return_value.classify_image.call_count == 2
+        assert os.path.getmtime(cache_path) > expired_time
+
+    def test_disk_cache_namespace(self):
+        """Test that the on-disk cache is separated by model and prompt."""
+        namespace = _disk_cache_namespace("gpt-4o", "prompt")
+
+        # Check that changing the model or the prompt changes the namespace
+        assert _disk_cache_namespace("gpt-4o", "prompt") == namespace
+        assert _disk_cache_namespace("gpt-4o-mini", "prompt") != namespace
+        assert _disk_cache_namespace("gpt-4o", "new prompt") != namespace
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_aclassify_bytes_coalesces_duplicates(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that concurrent classifications of identical bytes share one API call."""
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.aclassify_image = AsyncMock(side_effect=lambda path: dict(self.mock_result))
+
+        # Create the service
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+
+        # Classify the same image twice at the same time
+        async def run():
+            return await asyncio.gather(
+                service.aclassify_bytes(b"image_1", "image_1.png"), service.aclassify_bytes(b"image_1", "image_1_copy.png")
+            )
+
+        with patch.object(service, '_save_results_to_file'):
+            results = asyncio.run(run())
+
+        # Check that both callers got the result from a single API call
+        assert len(results) == 2
+        assert results[0]["adultContentRating"] == results[1]["adultContentRating"] == "high"
+        assert mock_model_cls.return_value.aclassify_image.await_count == 1
+
+    @patch('app.services.classification.ImageProcessor')
+    @patch('app.services.classification.OpenAIModel')
+    def test_concurrent_requests_share_api_bound(self, mock_model_cls, mock_processor_cls, tmp_path):
+        """Test that concurrent requests together stay within OPENAI_CONCURRENCY API calls."""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def classify(path):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return dict(self.mock_result)
+
+        # Set up the mocks
+        mock_processor_cls.return_value.process_image_bytes.return_value = ("data/79d754a275386650e7e71d67f3cde5f2.jpg", True)
+        mock_model_cls.return_value.aclassify_image = AsyncMock(side_effect=classify)
+
+        # Create the service
+        service = ClassificationService()
+        service.cache_dir = str(tmp_path)
+
+        # Classify more different images than the bound at the same time
+        count = 4 * settings.OPENAI_CONCURRENCY
+
+        async def run():
+            return await asyncio.gather(
+                *(service.aclassify_bytes(f"image_{i}".encode(), f"image_{i}.png") for i in range(count))
+            )
+
+        with patch.object(service, '_save_results_to_file'):
+            results = asyncio.run(run())
+
+        # Check that every image was classified without exceeding the global bound
+        assert len(results) == count
+        assert mock_model_cls.return_value.aclassify_image.await_count == count
+        assert max_in_flight == settings.OPENAI_CONCURRENCY
@@ -1,5 +1,8 @@
+import asyncio
 from unittest.mock import patch, MagicMock, mock_open
 
+import httpx
+
 from app.services.image_processor import ImageProcessor
 
 class TestImageProcessor:
@@ -15,12 +18,12 @@ class TestImageProcessor:
         # Create a mock file
         self.mock_file = MagicMock()
         self.mock_file.filename = "79d754a275386650e7e71d67f3cde5f2.png"
-        self.mock_file.file.read.return_value = b"image_data"
+        self.mock_file.file.read.side_effect = [b"image_data", b""]
         
         # Create a mock response for URL requests
         self.mock_response = MagicMock()
         self.mock_response.status_code = 200
-        self.mock_response.iter_content.return_value = [b"image_data"]
+        self.mock_response.raw.read.side_effect = [b"image_data", b""]
     
     @patch('app.services.image_processor.os.makedirs')
     def test_init(self, mock_makedirs):
@@ -35,16 +38,12 @@ class TestImageProcessor:
     @patch('app.services.image_processor.os.makedirs')
     @patch('app.services.image_processor.uuid.uuid4')
     @patch('app.services.image_processor.open', new_callable=mock_open)
-    @patch('app.services.image_processor.is_valid_image')
-    @patch('app.services.image_processor.normalize_image')
-    @patch('app.services.image_processor.get_image_info')
-    def test_process_uploaded_image_success(self, mock_get_info, mock_normalize, mock_is_valid, mock_open, mock_uuid, mock_makedirs):
+    @patch('app.services.image_processor.process_image')
+    def test_process_uploaded_image_success(self, mock_process, mock_open, mock_uuid, mock_makedirs):
         """Test that the image processor correctly processes an uploaded image."""
         # Set up the mocks
         mock_uuid.return_value = "79d754a275386650e7e71d67f3cde5f2"
-        mock_is_valid.return_value = True
-        mock_normalize.return_value = True
-        mock_get_info.return_value = {"width": 100, "height": 100}
+        mock_process.return_value = (True, {"width": 100, "height": 100, "original": {"width": 100, "height": 100}})
         
         # Create the image processor
         processor = ImageProcessor()
@@ -56,19 +55,18 @@ class TestImageProcessor:
         assert success is True
         assert "79d754a275386650e7e71d67f3cde5f2" in image_path
         mock_open.assert_called_once()
-        mock_is_valid.assert_called_once()
-        mock_normalize.assert_called_once()
+        mock_process.assert_called_once_with(image_path)
     
     @patch('app.services.image_processor.os.makedirs')
     @patch('app.services.image_processor.uuid.uuid4')
     @patch('app.services.image_processor.open', new_callable=mock_open)
-    @patch('app.services.image_processor.is_valid_image')
+    @patch('app.services.image_processor.process_image')
     @patch('app.services.image_processor.os.remove')
-    def test_process_uploaded_image_invalid(self, mock_remove, mock_is_valid, mock_open, mock_uuid, mock_makedirs):
+    def test_process_uploaded_image_invalid(self, mock_remove, mock_process, mock_open, mock_uuid, mock_makedirs):
         """Test that the image processor correctly handles an invalid uploaded image."""
         # Set up the mocks
         mock_uuid.return_value = "79d754a275386650e7e71d67f3cde5f2"
-        mock_is_valid.return_value = False
+        mock_process.return_value = (False, {})
         
         # Create the image processor
         processor = ImageProcessor()
@@ -80,24 +78,40 @@ class TestImageProcessor:
         assert success is False
         assert image_path == ""
         mock_open.assert_called_once()
-        mock_is_valid.assert_called_once()
+        mock_process.assert_called_once()
         mock_remove.assert_called_once()
     
+    @patch('app.services.image_processor.os.makedirs')
+    @patch('app.services.image_processor.uuid.uuid4')
+    @patch('app.services.image_processor.process_image_data')
+    def test_process_image_bytes_success(self, mock_process_data, mock_uuid, mock_makedirs):
+        """Test that the image processor correctly processes image bytes."""
+        # Set up the mocks
+        mock_uuid.return_value = "79d754a275386650e7e71d67f3cde5f2"
+        mock_process_data.return_value = (True, {"width": 100, "height": 100, "original": {"width": 100, "height": 100}})
+        
+        # Create the image processor
+        processor = ImageProcessor()
+        
+        # Process the image bytes
+        image_path, success = processor.process_image_bytes(b"image_data", "79d754a275386650e7e71d67f3cde5f2.png")
+        
+        # Check that the image was processed from memory
+        assert success is True
+        assert "79d754a275386650e7e71d67f3cde5f2" in image_path
+        mock_process_data.assert_called_once_with(b"image_data", image_path)
+    
     @patch('app.services.image_processor.os.makedirs')
     @patch('app.services.image_processor.uuid.uuid4')
     @patch('app.services.image_processor.requests.get')
     @patch('app.services.image_processor.open', new_callable=mock_open)
-    @patch('app.services.image_processor.is_valid_image')
-    @patch('app.services.image_processor.normalize_image')
-    @patch('app.services.image_processor.get_image_info')
-    def test_process_image_url_success(self, mock_get_info, mock_normalize, mock_is_valid, mock_open, mock_get, mock_uuid, mock_makedirs):
+    @patch('app.services.image_processor.process_image')
+    def test_process_image_url_success(self, mock_process, mock_open, mock_get, mock_uuid, mock_makedirs):
         """Test that the image processor correctly processes an image URL."""
         # Set up the mocks
         mock_uuid.return_value = "79d754a275386650e7e71d67f3cde5f2"
         mock_get.return_value = self.mock_response
-        mock_is_valid.return_value = True
-        mock_normalize.return_value = True
-        mock_get_info.return_value = {"width": 100, "height": 100}
+        mock_process.return_value = (True, {"width": 100, "height": 100, "original": {"width": 100, "height": 100}})
         
         # Create the image processor
         processor = ImageProcessor()
@@ -110,8 +124,32 @@ class TestImageProcessor:
         assert "79d754a275386650e7e71d67f3cde5f2" in image_path
         mock_get.assert_called_once()
         mock_open.assert_called_once()
-        mock_is_valid.assert_called_once()
-        mock_normalize.assert_called_once()
+        mock_process.assert_called_once_with(image_path)
+    
+    @patch('app.services.image_processor.os.makedirs')
+    @patch('app.services.image_processor.uuid.uuid4')
+    @patch('app.services.image_processor.requests.get')
+    @patch('app.services.image_processor.open', new_callable=mock_open)
+    @patch('app.services.image_processor.process_image')
+    def test_process_image_url_without_raw_stream(self, mock_process, mock_open, mock_get, mock_uuid, mock_makedirs):
+        """Test that the image processor falls back to iter_content when there is no raw stream."""
+        # Set up the mocks
+        mock_uuid.return_value = "79d754a275386650e7e71d67f3cde5f2"
+        self.mock_response.raw = None
+        self.mock_response.iter_content.return_value = [b"image_", b"data"]
+        mock_get.return_value = self.mock_response
+        mock_process.return_value = (True, {"width": 100, "height": 100, "original": {"width": 100, "height": 100}})
+        
+        # Create the image processor
+        processor = ImageProcessor()
+        
+        # Process an image URL
+        image_path, success = processor.process_image_url("https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png")
+        
+        # Check that the chunks were written to disk
+        assert success is True
+        handle = mock_open.return_value
+        assert [c.args[0] for c in handle.write.call_args_list] == [b"image_", b"data"]
     
     @patch('app.services.image_processor.os.makedirs')
     @patch('app.services.image_processor.requests.get')
@@ -131,4 +169,41 @@ class TestImageProcessor:
         # Check that the error was handled correctly
         assert success is False
         assert image_path == ""
-        mock_get.assert_called_once()
\ No newline at end of file
+        mock_get.assert_called_once()
+    
+    @patch('app.services.image_processor.os.makedirs')
+    @patch('app.services.image_processor.uuid.uuid4')
+    @patch('app.services.image_processor.process_image_data')
+    def test_aprocess_image_url_success(self, mock_process_data, mock_uuid, mock_makedirs):
+        """Test that the image processor correctly processes an image URL asynchronously."""
+        # Set up the mocks
+        mock_uuid.return_value = "79d754a275386650e7e71d67f3cde5f2"
+        mock_process_data.return_value = (True, {"width": 100, "height": 100, "original": {"width": 100, "height": 100}})
+        
+        # Create the image processor with a mock HTTP transport
+        processor = ImageProcessor()
+        processor._async_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=b"image_data"))
+        )
+        
+        # Process an image URL
+        image_path, success = asyncio.run(processor.aprocess_image_url("https://brandsafety-crawler.s3.amazonaws.com/screenshots/79d754a275386650e7e71d67f3cde5f2.png"))
+        
+        # Check that the downloaded image was processed from memory
+        assert success is True
+        assert "79d754a275386650e7e71d67f3cde5f2" in image_path
+        mock_process_data.assert_called_once_with(b"image_data", image_path)
+    
+    @patch('app.services.image_processor.os.makedirs')
+    def test_async_client_is_shared(self, mock_makedirs):
+        """Test that async downloads share one keep-alive connection pool."""
+        # Create the image processor
+        processor = ImageProcessor()
+        
+        # Get the client twice
+        client = processor._get_async_client()
+        
+        # Check that the same client is reused until the processor is closed
+        assert processor._get_async_client() is client
+        asyncio.run(processor.aclose())
+        assert processor._async_client is None
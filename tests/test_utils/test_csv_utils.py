@@ -0,0 +1,45 @@
+import csv
+import io
+
+from app.utils.csv_utils import format_csv_row
+
+class TestCsvUtils:
+    """
+    Tests for the CSV utilities.
+    
+    These tests verify that CSV rows are formatted exactly as csv.writer
+    formats them.
+    """
+    
+    def setup_method(self):
+        """Set up the test environment."""
+        # Create rows with plain fields, fields that need quoting and non-string fields
+        self.rows = [
+            ("Adult Content", "high", "98%", "Large number of adult content detected."),
+            ("Death, Injury, or Military Conflict", "low", "0%", "No conflict detected."),
+            ("Hate Speech", "medium", "64%", 'Text reads "hate" in the image.'),
+            ("Terrorism", "low", "0%", "Line one\nLine two\r\n"),
+            ("Drugs Content", None, 67, 0.5),
+            (None,),
+            ("",),
+            ("", ""),
+        ]
+    
+    def _csv_writer_row(self, fields):
+        """Format a row with csv.writer."""
+        output = io.StringIO()
+        csv.writer(output).writerow(fields)
+        return output.getvalue()
+    
+    def test_format_csv_row_matches_csv_writer(self):
+        """Test that every row is formatted exactly as csv.writer formats it."""
+        for row in self.rows:
+            assert format_csv_row(row) == self._csv_writer_row(row)
+    
+    def test_format_csv_row_none_is_empty(self):
+        """Test that None is written as an empty field."""
+        # Format a row with a missing value
+        row = format_csv_row(("Drugs Content", None, "67%", "Moderate drugs content."))
+        
+        # Check that the missing value is empty instead of "None"
+        assert row == "Drugs Content,,67%,Moderate drugs content.\r\n"
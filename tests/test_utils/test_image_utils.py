@@ -0,0 +1,237 @@
+import io
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+from PIL import Image, ImageFile
+
+from app.utils.image_utils import JPEG_QUALITY, MAX_IMAGE_DIMENSION, normalize_image, process_image, process_image_data
+
+class TestImageUtils:
+    """
+    Tests for the image utilities.
+    
+    These tests verify that images are validated and normalized correctly,
+    using small images written to a temporary directory.
+    """
+    
+    def test_process_image_downscales_large_image(self, tmp_path):
+        """Test that a large image is downscaled to fit within the maximum dimension."""
+        # Create a large PNG
+        image_path = str(tmp_path / "large.png")
+        Image.new("RGBA", (MAX_IMAGE_DIMENSION * 2, MAX_IMAGE_DIMENSION), "red").save(image_path)
+        
+        # Process the image
+        success, info = process_image(image_path)
+        
+        # Check that the image was normalized in place
+        assert success is True
+        assert (info["width"], info["height"]) == (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION // 2)
+        assert info["original"]["format"] == "PNG"
+        with Image.open(image_path) as img:
+            assert img.format == "JPEG"
+            assert img.size == (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION // 2)
+            assert img.info.get("progressive") == 1
+    
+    def test_normalize_image_cv2_resize(self, tmp_path):
+        """Test that the OpenCV resize produces the same size as the Pillow thumbnail."""
+        # Create a fake cv2 whose area resize is done by Pillow
+        mock_cv2 = MagicMock()
+        mock_cv2.resize.side_effect = lambda pixels, size, interpolation: np.asarray(
+            Image.fromarray(pixels).resize(size, Image.Resampling.BOX)
+        )
+        
+        # Create a large PNG whose downscaled height needs rounding
+        image_path = str(tmp_path / "large.png")
+        Image.new("RGB", (1235, 3), "red").save(image_path)
+        cv2_path = str(tmp_path / "cv2.jpg")
+        pillow_path = str(tmp_path / "pillow.jpg")
+        
+        # Normalize the image with and without OpenCV
+        with patch('app.utils.image_utils.cv2', mock_cv2), patch('app.utils.image_utils.np', np, create=True):
+            assert normalize_image(image_path, cv2_path) is True
+        with patch('app.utils.image_utils.cv2', None):
+            assert normalize_image(image_path, pillow_path) is True
+        
+        # Check that OpenCV's area interpolation was used and both images have the same size
+        mock_cv2.resize.assert_called_once()
+        assert mock_cv2.resize.call_args.kwargs == {"interpolation": mock_cv2.INTER_AREA}
+        with Image.open(cv2_path) as cv2_img, Image.open(pillow_path) as pillow_img:
+            assert cv2_img.size == pillow_img.size == (MAX_IMAGE_DIMENSION, 3)
+    
+    def test_normalize_image_turbojpeg(self, tmp_path):
+        """Test that normalized images are encoded with libjpeg-turbo when it is available."""
+        # Create a fake TurboJPEG that returns a pre-encoded JPEG
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 200), "red").save(buffer, "JPEG")
+        mock_turbo_jpeg = MagicMock()
+        mock_turbo_jpeg.encode.return_value = buffer.getvalue()
+        
+        # Create a PNG
+        image_path = str(tmp_path / "image.png")
+        Image.new("RGB", (300, 200), "red").save(image_path)
+        output_path = str(tmp_path / "normalized.jpg")
+        
+        # Normalize the image with the fake TurboJPEG
+        with patch('app.utils.image_utils._turbo_jpeg', mock_turbo_jpeg), \
+             patch('app.utils.image_utils.np', np, create=True), \
+             patch('app.utils.image_utils.TJPF_RGB', 0, create=True), \
+             patch('app.utils.image_utils.TJSAMP_420', 2, create=True), \
+             patch('app.utils.image_utils.TJFLAG_PROGRESSIVE', 16384, create=True), \
+             patch.object(Image.Image, "save") as mock_save:
+            assert normalize_image(image_path, output_path) is True
+        
+        # Check that TurboJPEG encoded the RGB pixels instead of Pillow
+        mock_turbo_jpeg.encode.assert_called_once()
+        pixels = mock_turbo_jpeg.encode.call_args.args[0]
+        assert pixels.shape == (200, 300, 3)
+        assert mock_turbo_jpeg.encode.call_args.kwargs == {
+            "quality": JPEG_QUALITY, "pixel_format": 0, "jpeg_subsample": 2, "flags": 16384
+        }
+        mock_save.assert_not_called()
+        with open(output_path, "rb") as f:
+            assert f.read() == buffer.getvalue()
+    
+    @patch('app.utils.image_utils._turbo_jpeg', None)
+    def test_normalize_image_pillow_fallback(self, tmp_path):
+        """Test that normalized images are encoded with Pillow when libjpeg-turbo is not available."""
+        # Create a PNG
+        image_path = str(tmp_path / "image.png")
+        Image.new("RGB", (300, 200), "red").save(image_path)
+        output_path = str(tmp_path / "normalized.jpg")
+        
+        # Normalize the image
+        with patch.object(Image.Image, "save", autospec=True, side_effect=Image.Image.save) as mock_save:
+            assert normalize_image(image_path, output_path) is True
+        
+        # Check that Pillow encoded a progressive JPEG
+        mock_save.assert_called_once()
+        assert mock_save.call_args.kwargs == {
+            "quality": JPEG_QUALITY, "optimize": True, "progressive": True, "subsampling": 2
+        }
+        with Image.open(output_path) as img:
+            assert img.format == "JPEG"
+            assert img.size == (300, 200)
+            assert img.info.get("progressive") == 1
+    
+    def test_normalize_image_rgba_to_rgb(self, tmp_path):
+        """Test that an RGBA screenshot is normalized to a 3-channel RGB JPEG."""
+        # Create a semi-transparent RGBA PNG
+        image_path = str(tmp_path / "screenshot.png")
+        Image.new("RGBA", (300, 200), (255, 0, 0, 128)).save(image_path)
+        output_path = str(tmp_path / "normalized.jpg")
+        
+        # Normalize the image
+        assert normalize_image(image_path, output_path) is True
+        
+        # Check that the alpha channel was dropped
+        with Image.open(output_path) as img:
+            assert img.mode == "RGB"
+            assert img.getbands() == ("R", "G", "B")
+            assert img.size == (300, 200)
+    
+    def test_process_image_unsupported_format(self, tmp_path):
+        """Test that an image in an unsupported format is rejected."""
+        # Create a GIF
+        image_path = str(tmp_path / "image.gif")
+        Image.new("P", (10, 10)).save(image_path)
+        
+        # Process the image
+        success, info = process_image(image_path)
+        
+        # Check that the image was rejected
+        assert success is False
+        assert info == {}
+    
+    @patch('app.utils.image_utils._MAX_IMAGE_PIXELS', 100 * 100)
+    def test_process_image_too_many_pixels(self, tmp_path):
+        """Test that an image with too many pixels is rejected before it is decoded."""
+        # Create an image just over the pixel limit
+        image_path = str(tmp_path / "image.png")
+        Image.new("RGB", (101, 100)).save(image_path)
+        
+        # Process the image
+        with patch.object(ImageFile.ImageFile, "load") as mock_load:
+            success, info = process_image(image_path)
+        
+        # Check that the image was rejected without decoding any pixel data
+        assert success is False
+        assert info == {}
+        mock_load.assert_not_called()
+    
+    def test_process_image_data_writes_normalized_image(self, tmp_path):
+        """Test that an image in memory is normalized and only the result is written."""
+        # Encode a PNG in memory
+        buffer = io.BytesIO()
+        Image.new("RGB", (200, 100), "green").save(buffer, "PNG")
+        output_path = str(tmp_path / "image.jpg")
+        
+        # Process the image bytes
+        success, info = process_image_data(buffer.getvalue(), output_path)
+        
+        # Check that the normalized image was written
+        assert success is True
+        assert info["original"]["format"] == "PNG"
+        with Image.open(output_path) as img:
+            assert img.format == "JPEG"
+            assert img.size == (200, 100)
+    
+    def test_process_image_keeps_small_jpeg(self, tmp_path):
+        """Test that a small RGB JPEG is not re-encoded."""
+        # Create a small JPEG
+        image_path = str(tmp_path / "small.jpg")
+        Image.new("RGB", (200, 100), "green").save(image_path, quality=95)
+        with open(image_path, "rb") as f:
+            original = f.read()
+        
+        # Process the image
+        success, info = process_image(image_path)
+        
+        # Check that the file was left untouched
+        assert success is True
+        assert (info["width"], info["height"]) == (200, 100)
+        with open(image_path, "rb") as f:
+            assert f.read() == original
+    
+    def test_normalize_image_copies_small_jpeg(self, tmp_path):
+        """Test that a small RGB JPEG is copied as-is to a different output path."""
+        # Create a small JPEG
+        image_path = str(tmp_path / "small.jpg")
+        Image.new("RGB", (200, 100), "green").save(image_path, quality=95)
+        output_path = str(tmp_path / "normalized.jpg")
+        
+        # Normalize the image
+        assert normalize_image(image_path, output_path) is True
+        
+        # Check that the output is a byte-for-byte copy
+        with open(image_path, "rb") as original, open(output_path, "rb") as normalized:
+            assert normalized.read() == original.read()
+    
+    def test_process_image_data_writes_small_jpeg(self, tmp_path):
+        """Test that a small RGB JPEG in memory is written without re-encoding."""
+        # Encode a small JPEG in memory
+        buffer = io.BytesIO()
+        Image.new("RGB", (200, 100), "green").save(buffer, "JPEG", quality=95)
+        output_path = str(tmp_path / "image.jpg")
+        
+        # Process the image bytes
+        success, info = process_image_data(buffer.getvalue(), output_path)
+        
+        # Check that the original bytes were written
+        assert success is True
+        with open(output_path, "rb") as f:
+            assert f.read() == buffer.getvalue()
+    
+    def test_process_image_data_truncated_jpeg(self, tmp_path):
+        """Test that a truncated small JPEG is rejected instead of saved."""
+        # Encode a small JPEG and cut it in half
+        buffer = io.BytesIO()
+        Image.effect_noise((200, 100), 64).convert("RGB").save(buffer, "JPEG")
+        data = buffer.getvalue()[:len(buffer.getvalue()) // 2]
+        output_path = str(tmp_path / "image.jpg")
+        
+        # Process the truncated bytes
+        success, info = process_image_data(data, output_path)
+        
+        # Check that the image was rejected
+        assert success is False
+        assert info == {}